@@ -0,0 +1,190 @@
+"""
+This file contains test cases to verify that the alternative board
+implementations in the `isolation` package behave exactly like the reference
+`isolation.Board` class.
+"""
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.zobrist import compute_key
+
+from features import get_features
+from scorefunctions import improved_score
+
+
+def random_playout(board_classes, seed, width=7, height=7):
+    """Play the same random game on one board of each of the given classes,
+    yielding the boards after every move.
+    """
+    rng = random.Random(seed)
+    boards = [cls("Player1", "Player2", width, height) for cls in board_classes]
+    yield boards
+    while True:
+        moves = boards[0].get_legal_moves()
+        if not moves:
+            return
+        move = rng.choice(moves)
+        for board in boards:
+            board.apply_move(move)
+        yield boards
+
+
+class BitBoardTest(unittest.TestCase):
+
+    def assertSameState(self, reference, board):
+        for player in ("Player1", "Player2"):
+            self.assertEqual(reference.get_legal_moves(player), board.get_legal_moves(player))
+            self.assertEqual(reference.get_player_location(player), board.get_player_location(player))
+            self.assertEqual(reference.is_winner(player), board.is_winner(player))
+            self.assertEqual(reference.is_loser(player), board.is_loser(player))
+            self.assertEqual(reference.utility(player), board.utility(player))
+        self.assertEqual(reference.active_player, board.active_player)
+        self.assertEqual(reference.get_blank_spaces(), board.get_blank_spaces())
+        self.assertEqual(reference.get_blank_spaces_count(), board.get_blank_spaces_count())
+        self.assertEqual(reference.to_string(), board.to_string())
+
+    def test_random_games(self):
+        """ Test BitBoard against Board over complete random games """
+        for seed, (w, h) in enumerate([(7, 7), (5, 5), (4, 6), (9, 3)]):
+            for reference, board in random_playout([isolation.Board, isolation.BitBoard], seed, w, h):
+                self.assertSameState(reference, board)
+                for move in [(0, 0), (h - 1, w - 1), (-1, 0), (0, w)]:
+                    self.assertEqual(reference.move_is_legal(move), board.move_is_legal(move))
+
+    def test_copy(self):
+        """ Test that BitBoard.copy and forecast_move leave the original intact """
+        board = isolation.BitBoard("Player1", "Player2")
+        board.apply_move((3, 3))
+        board.apply_move((0, 0))
+        before = board.to_string()
+        child = board.forecast_move((1, 2))
+        self.assertEqual(before, board.to_string())
+        self.assertNotEqual(before, child.to_string())
+        self.assertEqual(board.get_blank_spaces_count() - 1, child.get_blank_spaces_count())
+
+    def test_undo_move(self):
+        """ Test that undo_move restores the exact previous state """
+        for cls in (isolation.Board, isolation.BitBoard):
+            for boards in random_playout([cls], 7, 5, 6):
+                board = boards[0]
+                for move in board.get_legal_moves():
+                    before = board.copy()
+                    with board.played(move):
+                        self.assertEqual(before.move_count + 1, board.move_count)
+                    self.assertSameState(before, board)
+                    self.assertEqual(before.move_count, board.move_count)
+
+    def test_hash(self):
+        """ Test that the incremental hash matches a key computed from scratch """
+        for cls in (isolation.Board, isolation.BitBoard):
+            seen = {}
+            for boards in random_playout([cls], 11, 6, 6):
+                board = boards[0]
+                blank = set(board.get_blank_spaces())
+                blocked = [(r, c) for r in range(6) for c in range(6) if (r, c) not in blank]
+                locations = (board.get_player_location("Player1"), board.get_player_location("Player2"))
+                expected = compute_key(6, 6, blocked, locations, board.active_player == "Player2")
+                self.assertEqual(expected, board.hash())
+                self.assertEqual(expected, board.copy().hash())
+                self.assertNotIn(board.hash(), seen)
+                seen[board.hash()] = board.to_string()
+                for move in board.get_legal_moves():
+                    with board.played(move):
+                        self.assertNotEqual(expected, board.hash())
+                    self.assertEqual(expected, board.hash())
+
+    def test_inplace_search(self):
+        """ Test that in-place search matches forecast_move search """
+        for cls in (isolation.Board, isolation.BitBoard):
+            for method in ("minimax", "alphabeta"):
+                results = []
+                for inplace in (False, True):
+                    agentUT = game_agent.CustomPlayer(3, improved_score, False, method, inplace=inplace)
+                    agentUT.time_left = lambda: 1e3
+                    board = cls(agentUT, "null_agent")
+                    board.apply_move((2, 3))
+                    board.apply_move((4, 4))
+                    before = board.to_string()
+                    results.append(agentUT.dosearch(board, 3))
+                    self.assertEqual(before, board.to_string())
+                self.assertEqual(results[0], results[1])
+
+    def test_same_search(self):
+        """ Test that CustomPlayer picks the same move on both boards """
+        for method in ("minimax", "alphabeta"):
+            agentUT = game_agent.CustomPlayer(3, improved_score, False, method)
+            agentUT.time_left = lambda: 1e3
+            results = []
+            for cls in (isolation.Board, isolation.BitBoard):
+                board = cls(agentUT, "null_agent")
+                board.apply_move((2, 3))
+                board.apply_move((4, 4))
+                results.append(agentUT.dosearch(board, 3))
+            self.assertEqual(results[0], results[1])
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_symmetries(self):
+        """ Test the symmetries that leave the game state unchanged """
+        for cls in (isolation.Board, isolation.BitBoard):
+            board = cls("Player1", "Player2")
+            for move, count in [(None, 8), ((3, 3), 8), ((0, 0), 2), ((1, 2), 1)]:
+                if move is not None:
+                    board.apply_move(move)
+                symmetries = board.symmetries()
+                self.assertEqual(count, len(symmetries))
+                self.assertEqual(tuple(range(49)), symmetries[0])
+
+            board = cls("Player1", "Player2", 5, 3)
+            for move, count in [(None, 4), ((1, 2), 4), ((0, 2), 2), ((2, 4), 1)]:
+                if move is not None:
+                    board.apply_move(move)
+                self.assertEqual(count, len(board.symmetries()))
+
+            # Every symmetry maps the legal moves onto the legal moves
+            board = cls("Player1", "Player2", 5, 5)
+            board.apply_move((2, 2))
+            board.apply_move((0, 2))
+            self.assertEqual(2, len(board.symmetries()))
+            for transform in board.symmetries():
+                moves = board.get_legal_moves()
+                images = [divmod(transform[r * 5 + c], 5) for r, c in moves]
+                self.assertEqual(sorted(moves), sorted(images))
+
+
+class FeaturesTest(unittest.TestCase):
+
+    def test_features(self):
+        """ Test the features against the board, and their cache """
+        for cls in (isolation.Board, isolation.BitBoard):
+            for seed in range(5):
+                for board, in random_playout([cls], seed):
+                    features = get_features(board)
+                    self.assertIs(features, get_features(board))
+                    for player in ("Player1", "Player2"):
+                        opponent = board.get_opponent(player)
+                        own_moves = board.get_legal_moves(player)
+                        opp_moves = board.get_legal_moves(opponent)
+                        self.assertEqual(own_moves, features.own_moves(player))
+                        self.assertEqual(opp_moves, features.opp_moves(player))
+                        self.assertEqual(board.get_player_location(player), features.location(player))
+                        outcome = float("-inf") if board.is_loser(player) else float("inf") if board.is_winner(player) else 0
+                        self.assertEqual(outcome, features.outcome(player))
+                    self.assertEqual(len([x for x in own_moves if x in opp_moves]), features.overlap)
+                    # The next move resets the cache, and undoing it too
+                    if features.own_moves(board.active_player):
+                        board.apply_move(features.own_moves(board.active_player)[0])
+                        self.assertIsNot(features, get_features(board))
+                        board.undo_move()
+                        self.assertIsNot(features, get_features(board))
+                        self.assertEqual(features.active_moves, get_features(board).active_moves)
+                    with self.assertRaises(RuntimeError):
+                        features.own_moves("Player3")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""This file contains the endgame solver used by `CustomPlayer.alphabeta` once
+the two players can no longer reach any common cell.
+
+The cells each player can still reach are found with a flood fill of knight
+moves over the blank cells of the board (`Board.get_blank_mask()`). When the
+two regions are disjoint the players cannot interfere any more, and the game
+reduces to two independent longest-knight-path problems: the player to move
+wins if and only if its longest path is longer than the one of its opponent.
+
+The longest paths are found by a depth-first search memoized on (cell, cells
+left), with a node limit so that a large region falls back to the heuristic.
+"""
+from isolation import Board
+from isolation.bitboard import knight_tables, popcount
+
+CLOCK_INTERVAL = 1024   # Number of longest-path nodes between calls to check_time
+
+
+class SolverLimit(Exception):
+    """ The longest-path search exceeded its node or time limit """
+    pass
+
+
+class EndgameSolver:
+    """Solve partitioned positions exactly.
+
+    Parameters
+    ----------
+    max_nodes : int (optional)
+        The maximum number of longest-path nodes searched per position; the
+        position is left to the heuristic beyond that.
+
+    max_entries : int (optional)
+        The maximum number of longest paths and positions remembered. The
+        longest paths do not depend on the position they came from, so they
+        are kept across moves and games until the limit is reached.
+    """
+
+    def __init__(self, max_nodes=20000, max_entries=1 << 18):
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.paths = {}
+        self.positions = {}
+        self.nodes = 0
+        self.check_time = None
+        self.solved = 0
+        self.aborted = 0
+
+    def clear(self):
+        """ Forget the longest paths and the solved positions """
+        self.paths = {}
+        self.positions = {}
+
+    def region(self, tables, cell, blank):
+        """Return the bitmask of the blank cells a knight on `cell` can reach
+        through blank cells (the flood fill of its moves).
+        """
+        masks = tables.masks
+        region = 0
+        frontier = masks[cell] & blank
+        while frontier:
+            region |= frontier
+            reach = 0
+            while frontier:
+                bit = frontier & -frontier
+                frontier ^= bit
+                reach |= masks[bit.bit_length() - 1]
+            frontier = reach & blank & ~region
+        return region
+
+    def partition(self, game):
+        """Find the regions of the players if they are partitioned.
+
+        Returns
+        -------
+        (KnightTables, int, int, int, int) or None
+            The knight tables of the board, the cell index of the active and
+            inactive players, and the bitmask of the region of each, or None
+            if the players can still reach a common cell (or have not moved).
+        """
+        locations = (game.get_player_location(game.active_player),
+                     game.get_player_location(game.inactive_player))
+        if Board.NOT_MOVED in locations:
+            return None
+        tables = knight_tables(game.width, game.height)
+        blank = game.get_blank_mask()
+        active, inactive = (row * game.width + col for row, col in locations)
+        active_region = self.region(tables, active, blank)
+        inactive_region = self.region(tables, inactive, blank)
+        if active_region & inactive_region:
+            return None
+        return tables, active, inactive, active_region, inactive_region
+
+    def longest_path(self, tables, cell, blank):
+        """Return the number of moves of the longest knight path from `cell`
+        through the cells of `blank`.
+        """
+        key = (cell, blank)
+        length = self.paths.get(key)
+        if length is not None:
+            return length
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise SolverLimit()
+        if self.check_time is not None and self.nodes % CLOCK_INTERVAL == 0:
+            self.check_time()
+        moves = tables.masks[cell] & blank
+        upper = popcount(blank)
+        length = 0
+        while moves:
+            bit = moves & -moves
+            moves ^= bit
+            length = max(length, 1 + self.longest_path(tables, bit.bit_length() - 1, blank & ~bit))
+            if length == upper:
+                # Every cell left is on the path
+                break
+        self.paths[key] = length
+        return length
+
+    def solve(self, game, player, check_time=None):
+        """Solve the position of `game` if the players are partitioned.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position to solve.
+
+        player : object
+            The player whose point of view the score is given from.
+
+        check_time : callable (optional)
+            Called every CLOCK_INTERVAL nodes of the longest-path search,
+            e.g. to raise the Timeout of the search.
+
+        Returns
+        -------
+        (float, tuple(int, int)) or None
+            The score of the position for `player` (+inf if it wins, -inf if
+            it loses) and the best move of the player to move (the first move
+            of its longest path; (-1, -1) if it has none), or None if the
+            players are not partitioned or the limit was exceeded.
+        """
+        key = game.hash()
+        solved = self.positions.get(key)
+        if solved is False:
+            return None
+        if solved is None:
+            if len(self.paths) + len(self.positions) > self.max_entries:
+                self.clear()
+            partition = self.partition(game)
+            if partition is None:
+                self.positions[key] = False
+                return None
+            tables, active, inactive, active_region, inactive_region = partition
+            self.nodes = 0
+            self.check_time = check_time
+            try:
+                theirs = self.longest_path(tables, inactive, inactive_region)
+                best, move = -1, (-1, -1)
+                for bit, location in tables.moves[active]:
+                    if bit & active_region:
+                        length = self.longest_path(tables, bit.bit_length() - 1, active_region & ~bit)
+                        if length > best:
+                            best, move = length, location
+            except SolverLimit:
+                self.aborted += 1
+                self.positions[key] = False
+                return None
+            self.solved += 1
+            # The player to move runs out of moves first unless its path is
+            # strictly longer: it plays move i + 1 after its opponent's i-th
+            solved = (best + 1 > theirs, move)
+            self.positions[key] = solved
+        active_wins, move = solved
+        if active_wins == (player == game.active_player):
+            return float("inf"), move
+        return float("-inf"), move
+
+    def stats(self):
+        """ Return the counters of the solver, for logging """
+        return {"solved": self.solved, "aborted": self.aborted,
+                "paths": len(self.paths), "positions": len(self.positions)}
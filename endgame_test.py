@@ -0,0 +1,74 @@
+"""
+This file contains test cases for the endgame solver of endgame.py: the
+values and moves it returns for partitioned positions must match a search of
+the whole game tree.
+"""
+import random
+import unittest
+
+import isolation
+import game_agent
+
+
+class EndgameSolverTest(unittest.TestCase):
+
+    def test_solver(self):
+        """ Test the solver against a full-depth search of partitioned positions """
+        utility = lambda game, player: game.utility(player)
+        agentUT = game_agent.CustomPlayer(3, utility, True, "alphabeta", inplace=True, endgame=49)
+        solver = agentUT.solver
+        rng = random.Random(0)
+        solved = 0
+        while solved < 20:
+            board = isolation.BitBoard(agentUT, "null_agent")
+            while board.get_legal_moves() and solver.partition(board) is None:
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            depth = board.get_blank_spaces_count()
+            if board.active_player != agentUT or not board.get_legal_moves() or depth > 16:
+                continue
+            # Search the whole tree without the solver
+            agentUT.solver = None
+            agentUT.time_left = lambda: 1e3
+            expected, _ = agentUT.dosearch(board, depth)
+            score, move = solver.solve(board, agentUT)
+            self.assertEqual(expected, score)
+            # The move of the solver keeps the value of the position
+            with board.played(move):
+                self.assertEqual(expected, agentUT.alphabeta(board, depth - 1, maximizing_player=False)[0])
+
+            # With the solver, the search returns the solution at the root
+            agentUT.solver = solver
+            self.assertEqual(move, agentUT.get_move(board, board.get_legal_moves(), lambda: 1e3))
+            self.assertEqual((expected, 1), (agentUT.pv_score, agentUT.nodes))
+            solved += 1
+
+    def test_pondering(self):
+        """ Test that the ponder search solves the positions for the player it ponders for """
+        utility = lambda game, player: game.utility(player)
+        agentUT = game_agent.CustomPlayer(3, utility, True, "alphabeta", endgame=49, ponder=True)
+        agentUT.time_left = lambda: 1e3
+        rng = random.Random(1)
+        pondered = 0
+        while pondered < 10:
+            board = isolation.BitBoard(agentUT, "null_agent")
+            while board.get_legal_moves() and agentUT.solver.partition(board) is None:
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            replies = board.get_legal_moves()
+            if board.active_player == agentUT or not replies:
+                continue
+            # The opponent to move: ponder on its replies until the search is over
+            agentUT.ponderer.start(board)
+            agentUT.ponderer.thread.join(10.)
+            agentUT.ponderer.stop()
+            for reply in replies:
+                child = board.forecast_move(reply)
+                if not child.get_legal_moves():
+                    continue
+                depth, score, move = agentUT.ponderer.lookup(child)
+                self.assertEqual(agentUT.dosearch(child, depth), (score, move))
+                self.assertIn(score, (float("inf"), float("-inf")))
+            pondered += 1
+
+
+if __name__ == '__main__':
+    unittest.main()
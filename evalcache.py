@@ -0,0 +1,75 @@
+"""This file contains the evaluation cache that `CustomPlayer` can wrap its
+score function in, so that the leaves searched again by the next iterations of
+iterative deepening (or by the next moves) are not evaluated from scratch.
+
+The cache is keyed by the Zobrist key of the board (`Board.hash()`) and the
+player the score is given for, and evicts the least recently used entry once
+it is full. It is called like the score function it wraps: `(game, player)`.
+"""
+from collections import OrderedDict
+
+
+class EvalCache:
+    """Bounded LRU cache of the values of a score function.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The score function to cache, called as `score_fn(game, player)`.
+
+    max_entries : int (optional)
+        The maximum number of values kept in the cache.
+    """
+
+    def __init__(self, score_fn, max_entries=1 << 16):
+        self.score_fn = score_fn
+        self.max_entries = max_entries
+        self.__name__ = getattr(score_fn, "__name__", type(score_fn).__name__)
+        self.entries = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """ Reset the hit/miss counters reported by stats() """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self):
+        """ Drop every value of the cache (the counters are kept) """
+        self.entries.clear()
+
+    def __getstate__(self):
+        # The values are not sent to the worker processes of a parallel
+        # search, each starts with an empty cache
+        state = self.__dict__.copy()
+        state["entries"] = OrderedDict()
+        return state
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __call__(self, game, player):
+        key = (game.hash(), player)
+        entries = self.entries
+        score = entries.get(key)
+        if score is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return score
+        self.misses += 1
+        score = self.score_fn(game, player)
+        entries[key] = score
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return score
+
+    def __repr__(self):
+        return "EvalCache({})".format(self.__name__)
+
+    def stats(self):
+        """ Return the counters of the cache, for logging """
+        lookups = self.hits + self.misses
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.}
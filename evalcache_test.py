@@ -0,0 +1,37 @@
+"""
+This file contains test cases for the evaluation cache of evalcache.py.
+"""
+import unittest
+
+from evalcache import EvalCache
+from scorefunctions import improved_score
+from search_test import random_position
+
+
+class EvalCacheTest(unittest.TestCase):
+
+    def test_eviction(self):
+        """ Test the hits, misses and LRU eviction of the evaluation cache """
+        calls = []
+        def score_fn(game, player):
+            calls.append((game.hash(), player))
+            return improved_score(game, player)
+
+        cache = EvalCache(score_fn, max_entries=2)
+        self.assertEqual("score_fn", cache.__name__)
+        boards = [random_position("Player1", seed) for seed in range(3)]
+        player = boards[0].active_player
+        self.assertEqual(improved_score(boards[0], player), cache(boards[0], player))
+        cache(boards[0], player)
+        cache(boards[0], boards[0].get_opponent(player))
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+        cache(boards[0], player)
+        cache(boards[1], player)                # Evicts the least recently used
+        self.assertEqual((2, 1), (len(cache), cache.evictions))
+        cache(boards[0], player)
+        self.assertEqual((3, 3), (cache.hits, cache.misses))
+        self.assertEqual(len(calls), cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
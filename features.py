@@ -0,0 +1,103 @@
+"""This file contains the features of a game state used by the score functions
+in scorefunctions.py.
+
+The features are extracted once per game state: the legal moves and location
+of both players, the number of cells both can move to, the outcome and the
+stage of the game. They are cached on the board (`Board.__features__`, reset
+by `apply_move()` and `undo_move()`), so the components of a composite score
+function, and score functions evaluated for both players, share them. The
+features hold no reference to the board, so boards are still freed as soon as
+the search drops them.
+"""
+
+INFINITY = float('inf')
+
+
+class Features:
+    """The features of a game state, for both players.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The game state to extract the features of.
+    """
+
+    __slots__ = ("active", "inactive", "active_moves", "inactive_moves",
+                 "active_location", "inactive_location", "width", "height",
+                 "blank_count", "__overlap__")
+
+    def __init__(self, game):
+        self.active = active = game.active_player
+        self.inactive = inactive = game.inactive_player
+        self.active_moves = game.get_legal_moves(active)
+        self.inactive_moves = game.get_legal_moves(inactive)
+        self.active_location = game.get_player_location(active)
+        self.inactive_location = game.get_player_location(inactive)
+        self.width = game.width
+        self.height = game.height
+        self.blank_count = game.get_blank_spaces_count()
+        self.__overlap__ = None
+
+    def opponent(self, player):
+        """ Return the opponent of `player` (see `Board.get_opponent`) """
+        if player == self.active:
+            return self.inactive
+        elif player == self.inactive:
+            return self.active
+        raise RuntimeError("`player` must be an object registered as a player in the current game.")
+
+    def outcome(self, player):
+        """Return -inf if `player` lost the game, +inf if it won, or 0 if the
+        game is not over (see `Board.is_loser` and `Board.is_winner`).
+        """
+        if self.active_moves:
+            return 0
+        if player == self.active:
+            return float("-inf")
+        if player == self.inactive:
+            return float("inf")
+        return 0
+
+    def own_moves(self, player):
+        """ Return the legal moves of `player` """
+        if player == self.active:
+            return self.active_moves
+        elif player == self.inactive:
+            return self.inactive_moves
+        raise RuntimeError("`player` must be an object registered as a player in the current game.")
+
+    def opp_moves(self, player):
+        """ Return the legal moves of the opponent of `player` """
+        return self.own_moves(self.opponent(player))
+
+    def location(self, player):
+        """ Return the location of `player` """
+        if player == self.active:
+            return self.active_location
+        elif player == self.inactive:
+            return self.inactive_location
+        raise RuntimeError("`player` must be an object registered as a player in the current game.")
+
+    @property
+    def overlap(self):
+        """ The number of cells both players can move to """
+        if self.__overlap__ is None:
+            self.__overlap__ = len(set(self.active_moves).intersection(self.inactive_moves))
+        return self.__overlap__
+
+    @property
+    def stage(self):
+        """ The percentage of the cells of the board that are still blank """
+        total_spaces = self.width * self.height
+        assert total_spaces >= self.blank_count
+        percent_remaining = 100 * ((total_spaces - self.blank_count) / total_spaces)
+        return 100 - percent_remaining
+
+
+def get_features(game):
+    """ Return the features of a game state, extracting them on first use """
+    features = game.__features__
+    if features is None:
+        features = Features(game)
+        game.__features__ = features
+    return features
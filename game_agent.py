@@ -8,14 +8,37 @@ relative strength using tournament.py and include the results in your report.
 """
 import random
 import logging
-from collections import deque
-from scorefunctions import custom_score
+from collections import deque, Counter
+from scorefunctions import custom_score, is_symmetric
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from moveordering import ORDERINGS, promote
+from timemanager import TimeManager
+from pondering import Ponderer
+from parallel import RootSplitter
+from endgame import EndgameSolver
+from tablebase import Tablebase
+from openingbook import OpeningBook
+from evalcache import EvalCache
+
+logger = logging.getLogger('customplayer')
+
+NULL_WINDOW = 1e-6      # Width of the windows used to test a bound (pvs, mtdf)
+MTDF_MAX_PASSES = 50    # Maximum number of null-window searches per mtdf call
+MAX_CLOCK_INTERVAL = 4096   # Maximum number of nodes searched between clock reads
 
 class Timeout(Exception):
     """Subclass base exception for code clarity."""
     pass
 
 
+def is_exact(score, alpha, beta):
+    """Return whether a fail-soft score searched with the window (alpha, beta)
+    is exact: inside the window, or an infinite score (the game is decided).
+    Any other score is only a bound of the value.
+    """
+    return alpha < score < beta or score in (float("-inf"), float("inf"))
+
+
 class CustomPlayer:
     """Game-playing agent that chooses a move using your evaluation function
     and a depth-limited minimax algorithm with alpha-beta pruning. You must
@@ -37,26 +60,202 @@ class CustomPlayer:
         Flag indicating whether to perform fixed-depth search (False) or
         iterative deepening search (True).
 
-    method : {'minimax', 'alphabeta'} (optional)
-        The name of the search method to use in get_move().
+    method : {'minimax', 'alphabeta', 'pvs', 'mtdf'} (optional)
+        The name of the search method to use in get_move(): 'pvs' is
+        principal variation search and 'mtdf' is MTD(f), both built on
+        alphabeta (and best used with move ordering and a transposition
+        table).
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    inplace : boolean (optional)
+        Flag indicating whether the search should walk the game tree on the
+        board it was given, using `Board.apply_move()` and
+        `Board.undo_move()` (True), instead of allocating a new board for
+        every node with `Board.forecast_move()` (False).
+
+    tt_size : int (optional)
+        The maximum number of entries of the transposition table used by
+        alphabeta search to reuse the results of positions it has already
+        searched; 0 disables the table.
+
+    keep_tt : boolean (optional)
+        Flag indicating whether the transposition table should be kept
+        across calls to get_move() within a game (True), or cleared at the
+        start of every move (False).
+
+    ordering : {None, 'killers', 'mobility'} or object (optional)
+        The move-ordering strategy used by alphabeta search (see
+        moveordering.py): 'killers' tries the best move of the previous
+        iteration (or transposition table entry) first, then the killer
+        moves of the ply, then moves ranked by the history heuristic;
+        'mobility' tries the moves with the fewest onward moves first.
+        None searches the moves in the order generated by the board.
+
+    aspiration : float (optional)
+        Half-width of the aspiration window used by iterative deepening with
+        alphabeta or pvs: every iteration after the first searches a window
+        centered on the score of the previous iteration, and widens it on a
+        fail-low or fail-high. None searches every iteration with a full
+        window.
+
+    time_manager : boolean (optional)
+        Flag indicating whether iterative deepening should predict the
+        duration of the next iteration from the effective branching factor
+        and node rate of the completed ones, and stop when it cannot finish
+        in the time left (True), or start a new iteration whenever more than
+        `timeout` milliseconds are left (False).
+
+    max_overshoot : float (optional)
+        When set, the search reads the clock only every N nodes instead of at
+        every node, with N calibrated from the measured time per node so that
+        no more than `max_overshoot` milliseconds pass between two reads. The
+        search then aborts `max_overshoot` milliseconds earlier than
+        `timeout`, so the margin left to return is never reduced.
+
+    partial_results : boolean (optional)
+        Flag indicating whether the root of the search should try the best
+        move of the previous iteration first, and keep track of the best
+        root move found so far, so that an iteration interrupted by the time
+        limit can still improve on the move of the previous iteration. Only
+        the moves with an exact score are kept: not the bounds of a failed
+        aspiration window or null-window test, nor any move of 'mtdf'.
+
+    ponder : boolean (optional)
+        Flag indicating whether the player should keep searching in a
+        background thread while the opponent is thinking (see pondering.py).
+        The next call to get_move() resumes iterative deepening from the
+        result for the position played, with the transposition table (kept
+        across moves) and move ordering warmed up by the ponder search. The
+        thread slows down an opponent playing in the same process, so the
+        players of the in-process tournaments should not ponder.
+
+    workers : int (optional)
+        The number of worker processes that iterative deepening splits the
+        root moves between (see parallel.py); 1 searches in this process.
+        The score function must be picklable (e.g. a module-level function),
+        and close() stops the workers.
+
+    endgame : int (optional)
+        The number of blank cells from which alphabeta tries to solve the
+        positions exactly (see endgame.py): once the players can no longer
+        reach a common cell, the position is won by the player with the
+        longest knight path, and alphabeta returns that instead of searching
+        further. Positions the solver gives up on are searched as usual.
+        None disables the solver.
+
+    tablebase : str or `tablebase.Tablebase` (optional)
+        The path of a tablebase file written by `tablebase.generate()` (or
+        the opened tablebase). alphabeta looks every position up in it, and
+        returns the exact result and best move of the positions it holds.
+        Boards of another size are searched as usual.
+
+    book : str or `openingbook.OpeningBook` (optional)
+        The path of an opening book file written by
+        `openingbook.build_book()` (or the loaded book). get_move() plays
+        the book move without searching whenever the position is in the
+        book.
+
+    symmetry_plies : int (optional)
+        The number of plies from the root at which the searches skip the
+        moves that are symmetric to a move already searched (see
+        `Board.symmetries()`), as long as the board is still symmetric.
+        0 searches every move. This assumes that `score_fn` gives the same
+        value to symmetric positions: every move is searched, with a
+        warning, unless it is known to (see `scorefunctions.is_symmetric()`).
+
+    eval_cache : int (optional)
+        The maximum number of values of `score_fn` remembered by position
+        hash and player (see evalcache.py), so that the leaves searched again
+        by the next iterations are not evaluated again; 0 disables the cache.
     """
 
     def __init__(self, search_depth=3, score_fn=custom_score,
-                 iterative=True, method='minimax', timeout=10., quiessant_search=False):
+                 iterative=True, method='minimax', timeout=10., quiessant_search=False,
+                 inplace=False, tt_size=0, keep_tt=False, ordering=None, aspiration=None,
+                 time_manager=True, max_overshoot=None, partial_results=False, ponder=False,
+                 workers=1, endgame=None, tablebase=None, book=None,
+                 symmetry_plies=0, eval_cache=0):
+        # The arguments of the player, which identify its configuration (see tournament.py)
+        self.params = {name: value for name, value in locals().items() if name != "self"}
         self.search_depth = search_depth
         self.iterative = iterative
-        self.score = score_fn
+        self.score = EvalCache(score_fn, eval_cache) if eval_cache > 0 else score_fn
         self.method = method
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
         self.quiessant_search = quiessant_search
+        self.inplace = inplace
+        self.tt_size = tt_size
+        self.tt = TranspositionTable(tt_size) if tt_size > 0 else None
+        self.keep_tt = keep_tt
+        self.tt_game = None
+        self.ordering = ORDERINGS[ordering]() if isinstance(ordering, str) else ordering
+        self.pv_move = None
+        self.pv_score = 0.
+        self.null_window_search = False
+        self.aspiration = aspiration
+        self.aspiration_stats = Counter()
+        self.time_manager = TimeManager() if time_manager else None
+        self.max_overshoot = max_overshoot
+        self.ms_per_node = None
+        self.next_clock_check = 0
+        self.last_clock_check = None
+        self.partial_results = partial_results
+        self.root_best = None
+        self.null_window_root = False
+        self.root_move_count = 0
+        self.nodes = 0
+        self.ponderer = Ponderer(self) if ponder else None
+        self.splitter = RootSplitter(workers) if workers > 1 else None
+        self.depth_reached = 0
+        self.endgame = endgame
+        self.solver = EndgameSolver() if endgame is not None else None
+        self.tablebase = Tablebase(tablebase) if isinstance(tablebase, str) else tablebase
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        if symmetry_plies > 0 and not is_symmetric(score_fn):
+            logger.warning("Searching every move: %s is not known to score symmetric positions alike",
+                           getattr(score_fn, "__name__", score_fn))
+            symmetry_plies = 0
+        self.symmetry_plies = symmetry_plies
+        self.symmetries = {}
+        # The player of the game the searches score for, if not this one
+        # (e.g. the player a ponder search runs for, see pondering.py)
+        self.perspective = None
 #         self.logger = logging.getLogger('customplayer')
 
+    def __getstate__(self):
+        """Drop the state that is not sent to the worker processes of a
+        tournament: the clock, the ponder thread, the process pool, the
+        transposition table and the caches of the endgame solver and of the
+        symmetries (each worker fills its own).
+        """
+        state = self.__dict__.copy()
+        state.update(time_left=None, ponderer=self.ponderer is not None, splitter=None, tt=None,
+                     symmetries={})
+        if self.solver is not None:
+            state["solver"] = EndgameSolver(self.solver.max_nodes, self.solver.max_entries)
+        return state
+
+    def __setstate__(self, state):
+        """Rebuild the state dropped by __getstate__ with an idle ponder
+        thread. The transposition table is allocated by the first call to
+        get_move(), and the copy searches in the process it was sent to,
+        without worker processes of its own.
+        """
+        self.__dict__.update(state)
+        self.ponderer = Ponderer(self) if state["ponderer"] else None
+
+    def close(self):
+        """ Stop the background search and the worker processes, if any """
+        if self.ponderer is not None:
+            self.ponderer.stop()
+        if self.splitter is not None:
+            self.splitter.shutdown()
+
     def get_move(self, game, legal_moves, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -98,17 +297,66 @@ class CustomPlayer:
         options = game.get_legal_moves()
         assert options == legal_moves, "Mismatched moves"
 
+        pondered = None
+        if self.ponderer is not None:
+            # The ponder search shares the tables: wait until it has stopped
+            self.ponderer.stop()
+            pondered = self.ponderer.lookup(game)
+
+        if self.book is not None:
+            move = self.book.lookup(game)
+            if move in options:
+                logger.debug("Book move %s", move)
+                self.start_pondering(game, move)
+                return move
+
         # Perform any required initializations, including selecting an initial
         # move from the game board (i.e., an opening book), or returning
         # immediately if there are no legal moves
 
         score, move = None, random.choice(legal_moves) if len(legal_moves) > 0 else None
+        root_move_count = game.move_count
+        if self.tt_size > 0:
+            self.prepare_tt(game)
+        if self.ordering is not None:
+            self.ordering.new_search()
+        self.pv_move = None
+        self.symmetries.clear()
+        self.nodes = 0
+        self.depth_reached = 0
+        self.next_clock_check = 0
+        self.last_clock_check = None
         try:
             # Iterative deepening with Quiessance search:
             if self.iterative is True:
                 results = deque(maxlen=3)
-                for depth in range (self.search_depth, 25):
-                    score, move = self.dosearch(game, depth)
+                if self.time_manager is not None:
+                    self.time_manager.start()
+                # There is no point searching deeper than the number of moves left in the game
+                max_depth = max(self.search_depth, game.get_blank_spaces_count())
+                first_depth = self.search_depth
+                if pondered is not None and pondered[2] in options:
+                    # Resume from the deepest iteration completed while pondering
+                    depth, score, move = pondered
+                    self.pv_move, self.pv_score = move, score
+                    logger.debug("Pondered depth %d: score %s, move %s", depth, score, move)
+                    if score in (float('-inf'), float('inf')):
+                        first_depth = max_depth + 1
+                    else:
+                        first_depth = max(first_depth, depth + 1)
+                for depth in range (first_depth, max_depth + 1):
+                    nodes, started = self.nodes, self.time_left()
+                    if self.splitter is not None:
+                        score, move = self.splitter.search(self, game, depth)
+                    elif self.aspiration is not None and score is not None:
+                        score, move = self.aspiration_search(game, depth, score)
+                    else:
+                        score, move = self.dosearch(game, depth)
+                    self.pv_move, self.pv_score = move, score
+                    self.depth_reached = depth
+                    logger.debug("Depth %d: score %s, move %s, %d nodes", depth, score, move, self.nodes)
+                    if self.time_manager is not None:
+                        self.time_manager.record(depth, self.nodes - nodes, started - self.time_left())
                     results.append((score, move))
                     if self.quiessant_search is True:
                         if len(results) >=3 and all(x[1] == move for x in results):
@@ -117,6 +365,12 @@ class CustomPlayer:
                         break
                     if self.time_left() < self.TIMER_THRESHOLD:
                         break
+                    if self.time_manager is not None and \
+                            not self.time_manager.can_finish_next(self.time_left() - self.TIMER_THRESHOLD):
+                        logger.debug("Stopping before depth %d: %s", depth + 1, self.time_manager.stats())
+                        break
+            elif self.splitter is not None:
+                score, move = self.splitter.search(self, game, self.search_depth)
             else:
                 score, move = self.dosearch(game, self.search_depth)
                 assert score is not None
@@ -126,20 +380,184 @@ class CustomPlayer:
                 assert move in options, "Move ({}, {}) for '{}/{}' not from existing list of moves ({})".format(move, score, self.method, self.score, options)
         except Timeout:
             # Handle any actions required at timeout, if necessary
-            pass
+            if self.inplace:
+                # The search was interrupted in the middle of the tree, so
+                # take back the moves it had applied to the board
+                while game.move_count > root_move_count:
+                    game.undo_move()
+            if self.partial_results and self.root_best is not None:
+                # The root searched the previous best move first, and only
+                # keeps the moves with an exact score, so any move that beat
+                # it is a better answer
+                logger.debug("Timeout: move %s from the interrupted iteration replaces %s", self.root_best[1], move)
+                score, move = self.root_best
+
+        if self.tt is not None:
+            logger.debug("Transposition table: %s", self.tt.stats())
+        if self.aspiration is not None:
+            logger.debug("Aspiration windows: %s", dict(self.aspiration_stats))
+        if self.solver is not None:
+            logger.debug("Endgame solver: %s", self.solver.stats())
+        if isinstance(self.score, EvalCache):
+            logger.debug("Evaluation cache: %s", self.score.stats())
+        self.start_pondering(game, move)
 
         # Return the best move from the last completed search
         # (or iterative-deepening search iteration)
         return move
+
+    def prepare_tt(self, game):
+        """Clear the transposition table at the start of a move, unless it is
+        kept across moves and `game` continues the game of the previous move.
+        Entries are scored from this player's point of view, so the table is
+        also cleared when a new game starts or the player changes sides. The
+        table of a copy sent to another process is allocated here.
+        """
+        if self.tt is None:
+            self.tt, self.tt_game = TranspositionTable(self.tt_size), None
+        tt_game = (game.move_count % 2, game.move_count)
+        keep_tt = self.keep_tt or self.ponderer is not None
+        if not keep_tt or self.tt_game is None or \
+                tt_game[0] != self.tt_game[0] or tt_game[1] <= self.tt_game[1]:
+            self.tt.clear()
+        self.tt_game = tt_game
+
+    def start_pondering(self, game, move):
+        """ Ponder on the replies to `move`, if pondering is enabled """
+        if self.ponderer is not None and move in game.get_legal_moves():
+            self.ponderer.start(game.forecast_move(move))
+
+    def game_over(self, game):
+        """ Stop pondering when the game is over (called by `Board.play()`) """
+        if self.ponderer is not None:
+            self.ponderer.stop()
     
-    def dosearch(self, game, depth):
+    def dosearch(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+        self.root_move_count = game.move_count
+        self.root_best = None
         if self.method == 'minimax':
             mm_s, mm_m = self.minimax(game, depth)
             return mm_s, mm_m
+        elif self.method == 'pvs':
+            pv_s, pv_m = self.pvs(game, depth, alpha, beta)
+            return pv_s, pv_m
+        elif self.method == 'mtdf':
+            mt_s, mt_m = self.mtdf(game, depth, self.pv_score)
+            return mt_s, mt_m
         else: # alphabeta
-            ab_s, ab_m = self.alphabeta(game, depth)
+            ab_s, ab_m = self.alphabeta(game, depth, alpha, beta)
             return ab_s, ab_m
 
+    def aspiration_search(self, game, depth, guess):
+        """Search to the given depth with an aspiration window of half-width
+        `self.aspiration` centered on `guess` (the score of the previous
+        iteration). The window is doubled on the failing side, around the
+        bound returned by the search, until the score falls inside it.
+
+        Returns
+        -------
+        float
+            The score for the current search branch
+
+        tuple(int, int)
+            The best move for the current branch; (-1, -1) for no legal moves
+        """
+        if self.method not in ('alphabeta', 'pvs') or guess in (float("-inf"), float("inf")):
+            return self.dosearch(game, depth)
+
+        width = self.aspiration
+        alpha, beta = guess - width, guess + width
+        while True:
+            self.aspiration_stats['searches'] += 1
+            score, move = self.dosearch(game, depth, alpha, beta)
+            if alpha < score < beta or score in (float("-inf"), float("inf")):
+                # An infinite bound is exact: the game is decided either way
+                logger.debug("Depth %d: score %s in aspiration window (%s, %s)", depth, score, alpha, beta)
+                return score, move
+            width *= 2
+            if score <= alpha:
+                self.aspiration_stats['fail_low'] += 1
+                alpha = score - width
+            else:
+                self.aspiration_stats['fail_high'] += 1
+                beta = score + width
+
+    def check_time(self):
+        """Read the clock and raise Timeout if the search must stop, then
+        schedule the next clock read.
+
+        Without `max_overshoot` the clock is read at every node. Otherwise the
+        number of nodes until the next read is calibrated from the time per
+        node measured between the last two reads, so that at most
+        `max_overshoot` milliseconds pass between reads, and the search stops
+        that much earlier than `TIMER_THRESHOLD` to make up for it.
+        """
+        remaining = self.time_left()
+        if self.max_overshoot is None:
+            if remaining < self.TIMER_THRESHOLD:
+                raise Timeout()
+            self.next_clock_check = self.nodes + 1
+            return
+
+        if remaining < self.TIMER_THRESHOLD + self.max_overshoot:
+            raise Timeout()
+        if self.last_clock_check is not None:
+            nodes, clock = self.last_clock_check
+            if self.nodes > nodes:
+                measured = (clock - remaining) / (self.nodes - nodes)
+                # React at once to slower nodes, smooth out faster ones
+                if self.ms_per_node is None or measured > self.ms_per_node:
+                    self.ms_per_node = measured
+                else:
+                    self.ms_per_node = (self.ms_per_node + measured) / 2
+        self.last_clock_check = (self.nodes, remaining)
+
+        if self.ms_per_node is None:
+            interval = 1
+        elif self.ms_per_node <= 0:
+            interval = MAX_CLOCK_INTERVAL
+        else:
+            interval = int(min(self.max_overshoot, remaining - self.TIMER_THRESHOLD - self.max_overshoot) / self.ms_per_node)
+            interval = max(1, min(MAX_CLOCK_INTERVAL, interval))
+        self.next_clock_check = self.nodes + interval
+
+    def make_move(self, game, move):
+        """Return the board for the child of `game` reached by `move`: the
+        same board with the move applied when searching in place, or a new
+        board from `game.forecast_move()` otherwise. Every call must be paired
+        with a call to `unmake_move()` on the parent board.
+        """
+        if self.inplace:
+            game.apply_move(move)
+            return game
+        return game.forecast_move(move)
+
+    def unmake_move(self, game):
+        """Restore the parent board after searching a child obtained from
+        `make_move()`.
+        """
+        if self.inplace:
+            game.undo_move()
+
+    def unique_moves(self, game, moves):
+        """Return `moves` without the moves that a symmetry of the game
+        state maps onto an earlier move of the list. The symmetries of the
+        positions are kept by hash for the next iterations.
+        """
+        key = game.hash()
+        symmetries = self.symmetries.get(key)
+        if symmetries is None:
+            symmetries = self.symmetries[key] = game.symmetries()
+        if len(symmetries) == 1:
+            return moves
+        unique, seen = [], set()
+        for move in moves:
+            cell = move[0] * game.width + move[1]
+            if cell not in seen:
+                unique.append(move)
+                seen.update(transform[cell] for transform in symmetries)
+        return unique
+
     def minimax(self, game, depth, maximizing_player=True, tab='\t'):
         """Implement the minimax search algorithm as described in the lectures.
 
@@ -171,22 +589,32 @@ class CustomPlayer:
                 to pass the project unit tests; you cannot call any other
                 evaluation function directly.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise Timeout()
+        self.nodes += 1
+        if self.nodes >= self.next_clock_check:
+            self.check_time()
 
         legal_moves = game.get_legal_moves(game.active_player)
         if legal_moves is not None and len(legal_moves)>0:
             if depth>0: # Recursive case:
+                root = self.partial_results and maximizing_player and game.move_count == self.root_move_count
+                if root:
+                    legal_moves = promote(legal_moves, self.pv_move)
+                if game.move_count - self.root_move_count < self.symmetry_plies:
+                    legal_moves = self.unique_moves(game, legal_moves)
                 if maximizing_player:   # MAXIMIZING ply
                     score, move = None, None
                     for i,m in enumerate(legal_moves):
-                        newscore, _ = self.minimax(game.forecast_move(m), depth-1, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        newscore, _ = self.minimax(self.make_move(game, m), depth-1, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        self.unmake_move(game)
                         if score is None or newscore > score:
                             score, move = newscore, m
+                            if root:
+                                self.root_best = (score, move)
                 else:                   # MINIMIZING ply
                     score, move = None, None
                     for i,m in enumerate(legal_moves):
-                        newscore, _ = self.minimax(game.forecast_move(m), depth-1, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        newscore, _ = self.minimax(self.make_move(game, m), depth-1, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        self.unmake_move(game)
                         if score is None or newscore < score:
                             score, move = newscore, m
             else: # Base case (depth==0)
@@ -234,31 +662,98 @@ class CustomPlayer:
                 to pass the project unit tests; you cannot call any other
                 evaluation function directly.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise Timeout()
+        self.nodes += 1
+        if self.nodes >= self.next_clock_check:
+            self.check_time()
+
+        if self.tablebase is not None:
+            entry = self.tablebase.lookup(game)
+            if entry is not None:
+                win, move = entry
+                player = self if self.perspective is None else self.perspective
+                return float("inf") if win == (game.active_player == player) else float("-inf"), move
+
+        if self.solver is not None and game.get_blank_spaces_count() <= self.endgame:
+            solved = self.solver.solve(game, self if self.perspective is None else self.perspective,
+                                       self.check_time)
+            if solved is not None:
+                return solved
 
         floor = alpha
         ceiling = beta
+        tt_move = None
+        if self.tt is not None and depth > 0:
+            key = game.hash()
+            entry = self.tt.probe(key)
+            if entry is not None:
+                tt_move = entry[4]
+            if entry is not None and entry[1] >= depth:
+                _, _, bound, tt_score, tt_move = entry
+                if bound == EXACT:
+                    return tt_score, tt_move
+                elif bound == LOWER and tt_score > floor:
+                    floor = tt_score
+                elif bound == UPPER and tt_score < ceiling:
+                    ceiling = tt_score
+                if floor >= ceiling:
+                    return tt_score, tt_move
+            window = (floor, ceiling)
+
         legal_moves = game.get_legal_moves(game.active_player)
         if legal_moves is not None and len(legal_moves)>0:
             if depth>0: # Recursive case:
+                if self.ordering is not None:
+                    ply = game.move_count - self.root_move_count
+                    if tt_move is None and ply == 0:
+                        tt_move = self.pv_move
+                    legal_moves = self.ordering.order(game, legal_moves, ply, tt_move)
+                root = self.partial_results and maximizing_player and game.move_count == self.root_move_count
+                if root:
+                    legal_moves = promote(legal_moves, self.pv_move)
+                if game.move_count - self.root_move_count < self.symmetry_plies:
+                    legal_moves = self.unique_moves(game, legal_moves)
                 if maximizing_player:   # MAXIMIZING ply
                     score, move = None, None
                     for i,m in enumerate(legal_moves):
-                        newscore, _ = self.alphabeta(game.forecast_move(m), depth-1, floor, ceiling, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        child = self.make_move(game, m)
+                        if self.null_window_search and i > 0 and depth > 1:
+                            # Test whether the move beats the best one so far before searching it fully
+                            newscore, _ = self.alphabeta(child, depth-1, floor, floor + NULL_WINDOW, maximizing_player=not maximizing_player, tab=tab+'\t')
+                            # The score of the test is only a bound
+                            exact = False
+                            if floor < newscore < ceiling:
+                                newscore, _ = self.alphabeta(child, depth-1, floor, ceiling, maximizing_player=not maximizing_player, tab=tab+'\t')
+                                exact = is_exact(newscore, floor, ceiling)
+                        else:
+                            newscore, _ = self.alphabeta(child, depth-1, floor, ceiling, maximizing_player=not maximizing_player, tab=tab+'\t')
+                            exact = is_exact(newscore, floor, ceiling)
+                        self.unmake_move(game)
                         if score is None or newscore > score:
                             score, move = newscore, m
+                            if root and exact and not self.null_window_root:
+                                # Only a move with an exact score (inside the window) is known to be the best so far
+                                self.root_best = (score, move)
                             
                         # Alphabeta bookkeeping:
                         if score > floor:
                             floor = score   # Constrains children at the next (minimizing) layer to be above this value
                         if score >= ceiling: # No need to search any more if we've crossed the upper limit at this max layer already
+                            if self.ordering is not None:
+                                self.ordering.cutoff(game, m, ply, depth)
                             break
                 else:                   # MINIMIZING ply
 #                     print (tab + "MINIMIZING: (({})) {} < score < {}  ||  Moves: {}".format(depth, floor, ceiling, legal_moves))
                     score, move = None, None
                     for i,m in enumerate(legal_moves):
-                        newscore, _ = self.alphabeta(game.forecast_move(m), depth-1, floor, ceiling, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        child = self.make_move(game, m)
+                        if self.null_window_search and i > 0 and depth > 1:
+                            # Test whether the move is worse than the best one so far before searching it fully
+                            newscore, _ = self.alphabeta(child, depth-1, ceiling - NULL_WINDOW, ceiling, maximizing_player=not maximizing_player, tab=tab+'\t')
+                            if floor < newscore < ceiling:
+                                newscore, _ = self.alphabeta(child, depth-1, floor, ceiling, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        else:
+                            newscore, _ = self.alphabeta(child, depth-1, floor, ceiling, maximizing_player=not maximizing_player, tab=tab+'\t')
+                        self.unmake_move(game)
                         if score is None or newscore < score:
                             score, move = newscore, m
                             
@@ -266,10 +761,92 @@ class CustomPlayer:
                         if score < ceiling:
                             ceiling = score   # Constrains children at the next (maximizing) layer to be below this value
                         if score <= floor: # No need to search any more if we've crossed the lower limit at this min layer already
+                            if self.ordering is not None:
+                                self.ordering.cutoff(game, m, ply, depth)
                             break
+
+                if self.tt is not None:
+                    # The score is exact only if it fell inside the window searched
+                    if score <= window[0]:
+                        bound = UPPER
+                    elif score >= window[1]:
+                        bound = LOWER
+                    else:
+                        bound = EXACT
+                    self.tt.store(key, depth, bound, score, move)
             else: # Base case (depth==0)
                 score, move = self.score(game, self), None
         else: # We are at a DEAD-END here
             score, move = self.score(game, self), (-1, -1)
 
-        return score, move
\ No newline at end of file
+        return score, move
+
+    def pvs(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizing_player=True):
+        """Implement principal variation search (NegaScout): the first child
+        of every node is searched with the full (alpha, beta) window, and the
+        remaining children with a null window that only tests whether they
+        beat the best score so far. A child that does is searched again with
+        the full window. With good move ordering most null-window searches
+        fail quickly, which makes this cheaper than plain alphabeta.
+
+        The parameters and return values are the same as for alphabeta().
+        """
+        null_window_search = self.null_window_search
+        self.null_window_search = True
+        try:
+            return self.alphabeta(game, depth, alpha, beta, maximizing_player)
+        finally:
+            self.null_window_search = null_window_search
+
+    def mtdf(self, game, depth, guess=0.):
+        """Implement the MTD(f) search algorithm: converge on the minimax value
+        with a sequence of null-window alphabeta searches, each one moving
+        either the lower or the upper bound of the value towards the other.
+        The searches revisit the same positions, so this should be used with
+        a transposition table.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+
+        depth : int
+            Depth is an integer representing the maximum number of plies to
+            search in the game tree before aborting
+
+        guess : float
+            First guess of the minimax value, e.g. the score of the previous
+            iteration of iterative deepening
+
+        Returns
+        -------
+        float
+            The score for the current search branch
+
+        tuple(int, int)
+            The best move for the current branch; (-1, -1) for no legal moves
+        """
+        lower, upper = float("-inf"), float("inf")
+        score = guess if lower < guess < upper else 0.
+        move, proven = None, False
+        # Every pass only bounds the scores of the root moves, so none of
+        # them is kept as a partial result (see get_move)
+        null_window_root = self.null_window_root
+        self.null_window_root = True
+        try:
+            for _ in range(MTDF_MAX_PASSES):
+                beta = score + NULL_WINDOW if score == lower else score
+                score, pass_move = self.alphabeta(game, depth, beta - NULL_WINDOW, beta)
+                if score < beta:
+                    upper = score
+                    if not proven:
+                        move = pass_move
+                else:
+                    lower = score
+                    move, proven = pass_move, True
+                if lower >= upper:
+                    return lower, move
+            return score, move
+        finally:
+            self.null_window_root = null_window_root
@@ -0,0 +1,294 @@
+"""
+This file contains the `BitBoard` class, a drop-in replacement for
+`isolation.Board` that stores the blocked cells of the board in a single
+integer bitmask instead of a list of lists.
+
+Cell (row, col) is represented by bit `row * width + col`. The knight moves
+available from every cell are precomputed once per (width, height) by
+`knight_tables()`, so generating legal moves, counting blank cells and
+testing for a win or a loss only take a few bitwise operations.
+"""
+
+from collections import namedtuple
+from copy import copy
+
+from .isolation import Board
+
+
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2),  (1, 2), (2, -1),  (2, 1)]
+
+KnightTables = namedtuple("KnightTables", ["width", "height", "cells", "masks",
+                                           "moves", "column_order"])
+
+_TABLES = {}
+
+
+def knight_tables(width, height):
+    """
+    Return the precomputed knight-move tables for a board of the given size.
+
+    The tables are built on first use and shared by every board of the same
+    dimensions.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    ----------
+    KnightTables
+        cells : tuple<(int, int)>
+            The (row, column) coordinates of each cell index.
+        masks : tuple<int>
+            For each cell index, the bitmask of all cells a knight can reach
+            from that cell on an empty board.
+        moves : tuple<tuple<(int, (int, int))>>
+            For each cell index, the (bit, (row, column)) pairs of the knight
+            moves from that cell, in the same order as `Board.__get_moves__`.
+        column_order : tuple<(int, (int, int))>
+            The (bit, (row, column)) pairs of every cell, in the same order
+            as `Board.get_blank_spaces`.
+    """
+    key = (width, height)
+    tables = _TABLES.get(key)
+    if tables is None:
+        cells = tuple((i // width, i % width) for i in range(width * height))
+        moves = []
+        for r, c in cells:
+            moves.append(tuple((1 << ((r + dr) * width + c + dc), (r + dr, c + dc))
+                               for dr, dc in DIRECTIONS
+                               if 0 <= r + dr < height and 0 <= c + dc < width))
+        masks = tuple(sum(bit for bit, _ in cell_moves) for cell_moves in moves)
+        column_order = tuple((1 << (i * width + j), (i, j))
+                             for j in range(width) for i in range(height))
+        tables = KnightTables(width, height, cells, masks, tuple(moves), column_order)
+        _TABLES[key] = tables
+    return tables
+
+
+def popcount(mask):
+    """ Return the number of bits set in a non-negative integer. """
+    return bin(mask).count("1")
+
+
+class BitBoard(Board):
+    """
+    Implement a model for the game Isolation assuming each player moves like
+    a knight in chess, storing the blocked cells as an integer bitmask.
+
+    The public interface (and the order of the moves it generates) is
+    identical to `isolation.Board`, so the two classes can be used
+    interchangeably by the players and the score functions.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        super(BitBoard, self).__init__(player_1, player_2, width=width, height=height)
+        self.__board_state__ = None
+        self.__occupied__ = 0
+        self.__tables__ = knight_tables(width, height)
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = object.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
+        new_board.__last_player_move__ = copy(self.__last_player_move__)
+        new_board.__undo_stack__ = copy(self.__undo_stack__)
+        return new_board
+
+    def move_is_legal(self, move):
+        """
+        Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        row, col = move
+        return 0 <= row < self.height and \
+               0 <= col < self.width and \
+               not self.__occupied__ & (1 << (row * self.width + col))
+
+    def get_blank_spaces(self):
+        """
+        Return a list of the locations that are still available on the board.
+        """
+        occupied = self.__occupied__
+        return [cell for bit, cell in self.__tables__.column_order if not occupied & bit]
+
+    def get_blank_mask(self):
+        """
+        Return the blank cells of the board as a bitmask (see
+        `Board.get_blank_mask`).
+        """
+        return ((1 << (self.width * self.height)) - 1) & ~self.__occupied__
+
+    def get_legal_moves(self, player=None):
+        """
+        Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        ----------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self.__active_player__
+        return self.__get_moves__(self.__last_player_move__[player])
+
+    def apply_move(self, move):
+        """
+        Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        None
+        """
+        row, col = move
+        previous = self.__last_player_move__[self.__active_player__]
+        self.__toggle_hash__(self.__active_player__, move, previous)
+        self.__undo_stack__.append(previous)
+        self.__last_player_move__[self.__active_player__] = move
+        self.__occupied__ |= 1 << (row * self.width + col)
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        self.move_count += 1
+        self.__blank_space_count__ -= 1
+        self.__features__ = None
+
+    def undo_move(self):
+        """
+        Take back the last move applied with `apply_move()`, restoring the
+        exact game state from before that move (see `Board.undo_move`).
+        """
+        previous = self.__undo_stack__.pop()
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        move = self.__last_player_move__[self.__active_player__]
+        self.__toggle_hash__(self.__active_player__, move, previous)
+        row, col = move
+        self.__occupied__ &= ~(1 << (row * self.width + col))
+        self.__last_player_move__[self.__active_player__] = previous
+        self.move_count -= 1
+        self.__blank_space_count__ += 1
+        self.__features__ = None
+
+    def mobility(self, location):
+        """
+        Return the number of knight moves available from a location in the
+        current game state (see `Board.mobility`).
+        """
+        return popcount(self.__tables__.masks[location[0] * self.width + location[1]] & ~self.__occupied__)
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self.__inactive_player__ and not self.__has_moves__(self.__active_player__)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self.__active_player__ and not self.__has_moves__(self.__active_player__)
+
+    def utility(self, player):
+        """
+        Returns the utility of the current game state from the perspective
+        of the specified player (see `Board.utility`).
+        """
+        if not self.__has_moves__(self.__active_player__):
+
+            if player == self.__inactive_player__:
+                return float("inf")
+
+            if player == self.__active_player__:
+                return float("-inf")
+
+        return 0.
+
+    def __has_moves__(self, player):
+        """
+        Test whether the specified player has at least one legal move without
+        generating the list of moves.
+        """
+        move = self.__last_player_move__[player]
+        if move == Board.NOT_MOVED:
+            return self.__blank_space_count__ > 0
+        return bool(self.__tables__.masks[move[0] * self.width + move[1]] & ~self.__occupied__)
+
+    def __get_moves__(self, move):
+        """
+        Generate the list of possible moves for an L-shaped motion (like a
+        knight in chess).
+        """
+        if move == Board.NOT_MOVED:
+            return self.get_blank_spaces()
+
+        occupied = self.__occupied__
+        return [m for bit, m in self.__tables__.moves[move[0] * self.width + move[1]]
+                if not occupied & bit]
+
+    def to_string(self):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+
+        p1_loc = self.__last_player_move__[self.__player_1__]
+        p2_loc = self.__last_player_move__[self.__player_2__]
+
+        out = ''
+
+        for i in range(self.height):
+            out += ' | '
+
+            for j in range(self.width):
+
+                if not self.__occupied__ & (1 << (i * self.width + j)):
+                    out += ' '
+                elif p1_loc and i == p1_loc[0] and j == p1_loc[1]:
+                    out += '1'
+                elif p2_loc and i == p2_loc[0] and j == p2_loc[1]:
+                    out += '2'
+                else:
+                    out += '-'
+
+                out += ' | '
+            out += '\n\r'
+
+        return out
@@ -10,9 +10,13 @@ be available to project reviewers.
 
 import timeit
 
+from contextlib import contextmanager
 from copy import deepcopy
 from copy import copy
 
+from .symmetry import board_position, cell_transforms, transform_position
+from .zobrist import zobrist_keys
+
 
 TIME_LIMIT_MILLIS = 200
 
@@ -53,6 +57,12 @@ class Board(object):
         self.__blank_space_count__ = width * height
         self.__last_player_move__ = {player_1: Board.NOT_MOVED, player_2: Board.NOT_MOVED}
         self.__player_symbols__ = {Board.BLANK: Board.BLANK, player_1: 1, player_2: 2}
+        self.__undo_stack__ = []
+        self.__zobrist__ = zobrist_keys(width, height)
+        self.__location_keys__ = {player_1: self.__zobrist__.location[0],
+                                  player_2: self.__zobrist__.location[1]}
+        self.__hash_key__ = 0
+        self.__features__ = None
 
     @property
     def active_player(self):
@@ -102,6 +112,8 @@ class Board(object):
         new_board.__player_symbols__ = copy(self.__player_symbols__)
         new_board.__board_state__ = deepcopy(self.__board_state__)
         new_board.__blank_space_count__ = self.__blank_space_count__
+        new_board.__undo_stack__ = copy(self.__undo_stack__)
+        new_board.__hash_key__ = self.__hash_key__
         return new_board
 
     def forecast_move(self, move):
@@ -154,6 +166,16 @@ class Board(object):
         return [(i, j) for j in range(self.width) for i in range(self.height)
             if self.__board_state__[i][j] == Board.BLANK]
 
+    def get_blank_mask(self):
+        """
+        Return the blank cells of the board as a bitmask, with cell (row, col)
+        in bit `row * width + col`.
+        """
+        mask = 0
+        for row, col in self.get_blank_spaces():
+            mask |= 1 << (row * self.width + col)
+        return mask
+
     def get_player_location(self, player):
         """
         Find the current location of the specified player on the board.
@@ -190,6 +212,24 @@ class Board(object):
             player = self.active_player
         return self.__get_moves__(self.__last_player_move__[player])
 
+    def mobility(self, location):
+        """
+        Return the number of knight moves available from a location in the
+        current game state, e.g. the onward moves a player would have after
+        moving there.
+
+        Parameters
+        ----------
+        location : (int, int)
+            A coordinate pair (row, column) on the board.
+
+        Returns
+        ----------
+        int
+            The number of blank cells a knight could move to from `location`.
+        """
+        return len(self.__get_moves__(location))
+
     def apply_move(self, move):
         """
         Move the active player to a specified location.
@@ -205,11 +245,106 @@ class Board(object):
         None
         """
         row, col = move
+        previous = self.__last_player_move__[self.active_player]
+        self.__toggle_hash__(self.active_player, move, previous)
+        self.__undo_stack__.append(previous)
         self.__last_player_move__[self.active_player] = move
         self.__board_state__[row][col] = self.__player_symbols__[self.active_player]
         self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
         self.move_count += 1
         self.__blank_space_count__ -= 1
+        self.__features__ = None
+
+    def undo_move(self):
+        """
+        Take back the last move applied with `apply_move()`, restoring the
+        exact game state from before that move. Together with `apply_move()`
+        this allows a search to walk the game tree on a single board instead
+        of allocating a copy per node with `forecast_move()`.
+
+        Raises an IndexError if there is no move to take back.
+
+        Returns
+        ----------
+        None
+        """
+        previous = self.__undo_stack__.pop()
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        move = self.__last_player_move__[self.__active_player__]
+        self.__toggle_hash__(self.__active_player__, move, previous)
+        row, col = move
+        self.__board_state__[row][col] = Board.BLANK
+        self.__last_player_move__[self.__active_player__] = previous
+        self.move_count -= 1
+        self.__blank_space_count__ += 1
+        self.__features__ = None
+
+    def hash(self):
+        """
+        Return the 64-bit Zobrist key of the current game state, covering the
+        blocked cells, the location of both players and the side to move.
+        The key is maintained incrementally by `apply_move()` and
+        `undo_move()`, and is stable across runs for a given board size.
+        """
+        return self.__hash_key__
+
+    def symmetries(self):
+        """
+        Return the symmetries of the board (see `isolation.symmetry`) that
+        leave the current game state unchanged: the blocked cells and the
+        location of each player are mapped onto themselves, so the moves
+        they map onto each other have the same value.
+
+        Returns
+        ----------
+        list<tuple<int>>
+            The symmetries as permutations of the cell indexes (row * width
+            + column); the identity always comes first.
+        """
+        position = board_position(self)
+        _, active, inactive = position
+        symmetries = []
+        for transform in cell_transforms(self.width, self.height):
+            # Most symmetries move a player: check that before mapping every cell
+            if (active < 0 or transform[active] == active) and \
+                    (inactive < 0 or transform[inactive] == inactive) and \
+                    transform_position(position, transform) == position:
+                symmetries.append(transform)
+        return symmetries
+
+    def __toggle_hash__(self, player, move, previous):
+        """
+        XOR the keys for `player` moving from `previous` to `move` into the
+        hash of the board. Toggling the same move twice restores the hash.
+        """
+        keys = self.__zobrist__
+        location_keys = self.__location_keys__[player]
+        index = move[0] * self.width + move[1]
+        key = self.__hash_key__ ^ keys.blocked[index] ^ location_keys[index] ^ keys.side
+        if previous != Board.NOT_MOVED:
+            key ^= location_keys[previous[0] * self.width + previous[1]]
+        self.__hash_key__ = key
+
+    @contextmanager
+    def played(self, move):
+        """
+        Context manager that applies a move on entry and takes it back on
+        exit, e.g.:
+
+            with game.played((2, 3)):
+                score = evaluate(game)
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self.apply_move(move)
+        try:
+            yield self
+        finally:
+            self.undo_move()
 
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
@@ -305,6 +440,17 @@ class Board(object):
 
         return out
 
+    def __game_over__(self):
+        """
+        Notify the players that the game run by play() is over, by calling
+        `game_over(game)` on the players that define it (e.g. to stop a
+        search running on the opponent's time).
+        """
+        for player in (self.__player_1__, self.__player_2__):
+            game_over = getattr(player, "game_over", None)
+            if callable(game_over):
+                game_over(self)
+
     def play(self, time_limit=TIME_LIMIT_MILLIS):
         """
         Execute a match between the players by alternately soliciting them
@@ -322,8 +468,12 @@ class Board(object):
             Return multiple including the winning player, the complete game
             move history, and a string indicating the reason for losing
             (e.g., timeout or invalid move).
+
+        The number of milliseconds each move took is kept in `move_times`,
+        in the order of the moves.
         """
         move_history = []
+        self.move_times = []
 
         curr_time_millis = lambda: 1000 * timeit.default_timer()
 
@@ -337,6 +487,7 @@ class Board(object):
             time_left = lambda : time_limit - (curr_time_millis() - move_start)
             curr_move = self.active_player.get_move(game_copy, legal_player_moves, time_left)
             move_end = time_left()
+            self.move_times.append(time_limit - move_end)
 
             # print move_end
 
@@ -349,9 +500,11 @@ class Board(object):
                 move_history[-1].append(curr_move)
 
             if move_end < 0:
+                self.__game_over__()
                 return self.__inactive_player__, move_history, "timeout"
 
             if curr_move not in legal_player_moves:
+                self.__game_over__()
                 return self.__inactive_player__, move_history, "illegal move"
 
             self.apply_move(curr_move)
@@ -0,0 +1,126 @@
+"""
+This file contains the symmetries of the Isolation board, used to fold
+equivalent positions together (e.g. in the opening book).
+
+The game is invariant under the symmetries of the board rectangle: the
+identity, the half turn and the two mirror images for every board, plus the
+quarter turns and the two diagonal mirror images for a square board (the 8
+elements of the dihedral group).
+
+Positions are handled in a compact form, independent of which player is which:
+(occupied, active, inactive), with the bitmask of the occupied cells (cell
+(row, col) in bit `row * width + col`) and the cell index of the player to
+move and of its opponent (-1 before their first move).
+"""
+
+_TRANSFORMS = {}
+
+
+def cell_transforms(width, height):
+    """
+    Return the symmetries of a board of the given size, as permutations of
+    the cell indexes.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    ----------
+    tuple<tuple<int>>
+        For each symmetry (the identity first), the index of the image of
+        every cell index.
+    """
+    size = (width, height)
+    transforms = _TRANSFORMS.get(size)
+    if transforms is None:
+        maps = [lambda r, c: (r, c),
+                lambda r, c: (height - 1 - r, width - 1 - c),
+                lambda r, c: (height - 1 - r, c),
+                lambda r, c: (r, width - 1 - c)]
+        if width == height:
+            maps += [lambda r, c: (c, r),
+                     lambda r, c: (width - 1 - c, height - 1 - r),
+                     lambda r, c: (c, height - 1 - r),
+                     lambda r, c: (width - 1 - c, r)]
+        transforms = []
+        for transform in maps:
+            cells = [transform(i // width, i % width) for i in range(width * height)]
+            transforms.append(tuple(r * width + c for r, c in cells))
+        transforms = tuple(transforms)
+        _TRANSFORMS[size] = transforms
+    return transforms
+
+
+def inverse(transform):
+    """ Return the inverse of a permutation of the cell indexes """
+    result = [0] * len(transform)
+    for cell, image in enumerate(transform):
+        result[image] = cell
+    return tuple(result)
+
+
+def position_key(occupied, active, inactive, cells):
+    """
+    Pack a position into a single integer: the occupied cells in the low
+    `cells` bits, then the cell index + 1 of the player to move and of its
+    opponent, 6 bits each. The key is exact (and fits in 64 bits) for boards
+    of up to 52 cells.
+    """
+    return occupied | (active + 1) << cells | (inactive + 1) << (cells + 6)
+
+
+def board_position(game):
+    """
+    Return the (occupied, active, inactive) position of an `isolation.Board`.
+    """
+    cells = game.width * game.height
+    indexes = []
+    for player in (game.active_player, game.inactive_player):
+        location = game.get_player_location(player)
+        indexes.append(-1 if location is None else location[0] * game.width + location[1])
+    occupied = ((1 << cells) - 1) & ~game.get_blank_mask()
+    return occupied, indexes[0], indexes[1]
+
+
+def transform_position(position, transform):
+    """
+    Return the image of an (occupied, active, inactive) position by a
+    symmetry from `cell_transforms()`.
+    """
+    occupied, active, inactive = position
+    image = 0
+    while occupied:
+        bit = occupied & -occupied
+        occupied ^= bit
+        image |= 1 << transform[bit.bit_length() - 1]
+    return (image,
+            transform[active] if active >= 0 else -1,
+            transform[inactive] if inactive >= 0 else -1)
+
+
+def canonical_position(game):
+    """
+    Return the key of the canonical form of the position of a board (the
+    smallest key of its images by every symmetry of the board), and the
+    symmetry that maps the board onto it.
+
+    Returns
+    ----------
+    (int, tuple<int>)
+        The key of the canonical position (see `position_key`), and the
+        permutation of the cell indexes from the board to the canonical
+        position.
+    """
+    cells = game.width * game.height
+    position = board_position(game)
+    best = None
+    for transform in cell_transforms(game.width, game.height):
+        key = position_key(*transform_position(position, transform), cells=cells)
+        if best is None or key < best[0]:
+            best = (key, transform)
+    return best
@@ -0,0 +1,93 @@
+"""
+This file contains the Zobrist keys used by `isolation.Board` to maintain a
+64-bit hash of the game state incrementally as moves are applied and taken
+back.
+
+The key of a position is the XOR of:
+    - one key per blocked cell,
+    - one key per (player, cell) for the location of each player,
+    - a side-to-move key whenever player 2 holds the initiative.
+
+The keys are generated from a fixed seed for every board size, so the hash of
+a position is stable across runs and processes.
+"""
+
+import random
+
+from collections import namedtuple
+
+
+ZobristKeys = namedtuple("ZobristKeys", ["blocked", "location", "side"])
+
+_KEYS = {}
+
+
+def zobrist_keys(width, height):
+    """
+    Return the Zobrist keys for a board of the given size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    ----------
+    ZobristKeys
+        blocked : tuple<int>
+            The key of each blocked cell, by cell index (row * width + col).
+        location : (tuple<int>, tuple<int>)
+            The keys of the location of player 1 and player 2, by cell index.
+        side : int
+            The key toggled on every move, set when player 2 is to move.
+    """
+    size = (width, height)
+    keys = _KEYS.get(size)
+    if keys is None:
+        rng = random.Random("isolation-zobrist-{}x{}".format(width, height))
+        cells = width * height
+        blocked = tuple(rng.getrandbits(64) for _ in range(cells))
+        location = (tuple(rng.getrandbits(64) for _ in range(cells)),
+                    tuple(rng.getrandbits(64) for _ in range(cells)))
+        keys = ZobristKeys(blocked, location, rng.getrandbits(64))
+        _KEYS[size] = keys
+    return keys
+
+
+def compute_key(width, height, blocked_cells, locations, player_2_to_move):
+    """
+    Compute the Zobrist key of a game state from scratch. `Board.hash()`
+    returns the same value, maintained incrementally.
+
+    Parameters
+    ----------
+    width, height : int
+        The dimensions of the board.
+
+    blocked_cells : iterable<(int, int)>
+        The (row, column) coordinates of every blocked cell, including the
+        cells occupied by the players.
+
+    locations : ((int, int), (int, int))
+        The locations of player 1 and player 2; None for a player that has
+        not moved yet.
+
+    player_2_to_move : bool
+        True if player 2 holds the initiative.
+
+    Returns
+    ----------
+    int
+        The 64-bit key of the game state.
+    """
+    keys = zobrist_keys(width, height)
+    key = keys.side if player_2_to_move else 0
+    for row, col in blocked_cells:
+        key ^= keys.blocked[row * width + col]
+    for player, location in enumerate(locations):
+        if location is not None:
+            key ^= keys.location[player][location[0] * width + location[1]]
+    return key
@@ -4,6 +4,8 @@ Created on Mar 4, 2017
 @author: safdar
 '''
 
+import itertools
+
 from collections import namedtuple
 
 from isolation import Board
@@ -14,6 +16,8 @@ from scorefunctions import improved_score
 from scorefunctions import net_advantage_score
 from scorefunctions import custom_score
 from game_agent import CustomPlayer
+from resultstore import ResultStore
+from sweep import Contestant, expand_grid, run_sweep
 import warnings
 from isolation.visualizer import Visualizer
 import random
@@ -21,70 +25,50 @@ import random
 TIME_LIMIT = 200
 NUM_MATCHES = 5
 VISUALIZE = True
+RESULTS = None  # file recording the games of tryall() (see resultstore.py), e.g. "matcher.sqlite"
 Agent = namedtuple("Agent", ["player", "name"])
 
-def tryall():
+def tryall(processes=None, results=RESULTS):
+    """
+    Play every configuration of the improved and custom heuristics against
+    random play and every configuration of the other heuristics (see
+    sweep.py). The pairings already recorded in the `results` store are not
+    played again; None keeps the games in memory only.
+    """
+    def name(params):
+        return "{:16s} / {:9s} / DEPTH({:1d}) / ITER({:1b})".format(
+            params["score_fn"].__name__, params["method"], params["search_depth"], params["iterative"])
+
     # Setup all the permutations
-    search_depths = [3, 5]
-    score_functions = [null_score, open_move_score, improved_score, custom_score]
-    methods = ["minimax", "alphabeta"]
-    iteratives = [False, True]
-    
-    # Setup the players:
-    player1_agents = []
-    player2_agents = [Agent(RandomPlayer(), "random_player")]
-    for score_function in score_functions:
-        for method in methods:
-            for iterative in iteratives:
-                for search_depth in search_depths:
-                    params = {"search_depth": search_depth, "method": method, "iterative": iterative, "score_fn": score_function}
-                    name = "{:16s} / {:9s} / DEPTH({:1d}) / ITER({:1b})".format(score_function.__name__, method, search_depth, iterative)
-                    if score_function is improved_score or score_function is custom_score:
-                        player1_agents.append(Agent(CustomPlayer(**params), name))
-                    else:
-                        player2_agents.append(Agent(CustomPlayer(**params), name))
-                    
+    grid = {"score_fn": [improved_score, custom_score],
+            "method": ["minimax", "alphabeta"],
+            "iterative": [False, True],
+            "search_depth": [3, 5]}
+    player1_agents = expand_grid(grid, name=name)
+    player2_agents = [Contestant("random_player", RandomPlayer, {})]
+    player2_agents += expand_grid(dict(grid, score_fn=[null_score, open_move_score]), name=name)
+
     # Launch the matches for each pair:
-    counter = 0
-    for player1 in player1_agents:
-        for player2 in player2_agents:
-            counter += 1
-            # Play some games:
-            wins = 0.
-            num_wins = {player1: 0, player2: 0}
-            num_timeouts = {player1: 0, player2: 0}
-            num_invalid_moves = {player1: 0, player2: 0}
-            print("{:2d}: {:50s}\t--VS--\t {:50s}".format(counter, player1.name, player2.name), end=' ')
-            for _ in range(0, NUM_MATCHES):
-                games = [Board(player1.player, player2.player), Board(player2.player, player1.player)]
-                
-                # initialize both games with a random move and response
-                for _ in range(2):
-                    move = random.choice(games[0].get_legal_moves())
-                    games[0].apply_move(move)
-                    games[1].apply_move(move)
-            
-                # play both games and tally the results
-                for game in games:
-                    winner, moves, termination = game.play(time_limit=TIME_LIMIT)
-                    if player1.player == winner:
-                        num_wins[player1] += 1
-                        if termination == "timeout":
-                            num_timeouts[player2] += 1
-                        else:
-                            num_invalid_moves[player2] += 1
-                    elif player2.player == winner:
-                        num_wins[player2] += 1
-                        if termination == "timeout":
-                            num_timeouts[player1] += 1
-                        else:
-                            num_invalid_moves[player1] += 1
-            winratio = 100 * (num_wins[player1] / (num_wins[player1] + num_wins[player2]))
-            print("==>: Wins {:3.0f} % {:5s} ({:2d} to {:2d}) / Timeouts ({:2d} to {:2d})".\
-                  format(winratio, \
-                         "..|  " if winratio <= 50 else "  |..", \
-                         int(num_wins[player1]), int(num_wins[player2]), \
-                         int(num_timeouts[player1]), int(num_timeouts[player1])))
+    with ResultStore(results if results is not None else ":memory:") as store:
+        matches = run_sweep(player1_agents, player2_agents, NUM_MATCHES, store,
+                            processes=processes, time_limit=TIME_LIMIT)
+    for counter, (player1, player2) in enumerate(itertools.product(player1_agents, player2_agents), 1):
+        num_wins = {player1.name: 0, player2.name: 0}
+        num_timeouts = {player1.name: 0, player2.name: 0}
+        for games in matches[(player1.name, player2.name)]:
+            for game in games:
+                if game["winner"] is not None:
+                    num_wins[game["winner"]] += 1
+                    if game["termination"] == "timeout":
+                        loser = player2.name if game["winner"] == player1.name else player1.name
+                        num_timeouts[loser] += 1
+        print("{:2d}: {:50s}\t--VS--\t {:50s}".format(counter, player1.name, player2.name), end=' ')
+        winratio = 100 * (num_wins[player1.name] / (num_wins[player1.name] + num_wins[player2.name]))
+        print("==>: Wins {:3.0f} % {:5s} ({:2d} to {:2d}) / Timeouts ({:2d} to {:2d})".\
+              format(winratio, \
+                     "..|  " if winratio <= 50 else "  |..", \
+                     int(num_wins[player1.name]), int(num_wins[player2.name]), \
+                     int(num_timeouts[player1.name]), int(num_timeouts[player2.name])))
 
 def mymain():
     visualizing = False
@@ -0,0 +1,78 @@
+"""This file contains the move-ordering strategies that `CustomPlayer` can use
+to sort the children of a node before alphabeta search walks them. Searching
+the best move first makes the cutoffs happen as early as possible.
+
+Every strategy implements the same interface:
+
+    order(game, moves, ply, best_move)  -> list of moves, best first
+    cutoff(game, move, ply, depth)      -> record a move that caused a cutoff
+    new_search()                        -> called at the start of every move
+"""
+
+
+def promote(moves, best_move):
+    """Return `moves` with `best_move` (e.g. the best move of the previous
+    iteration, or from the transposition table) moved to the front.
+    """
+    if best_move is not None and best_move in moves and moves[0] != best_move:
+        moves = [best_move] + [m for m in moves if m != best_move]
+    return moves
+
+
+class KillerOrdering:
+    """Order moves by: the best move from a previous search of the node, then
+    the killer moves of the ply (the last moves to cause a cutoff at the same
+    distance from the root), then the history heuristic (how often and how
+    deep each move caused cutoffs so far).
+
+    Parameters
+    ----------
+    num_killers : int (optional)
+        The number of killer moves remembered per ply.
+    """
+
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        self.killers = {}
+        self.history = {}
+
+    def new_search(self):
+        """ Forget the killer moves and age the history of the previous move """
+        self.killers = {}
+        self.history = {key: weight // 2 for key, weight in self.history.items() if weight > 1}
+
+    def order(self, game, moves, ply, best_move=None):
+        side = ply % 2
+        history = self.history
+        ordered = sorted(moves, key=lambda m: -history.get((side, m), 0))
+        for killer in reversed(self.killers.get(ply, ())):
+            ordered = promote(ordered, killer)
+        return promote(ordered, best_move)
+
+    def cutoff(self, game, move, ply, depth):
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.num_killers:]
+        key = (ply % 2, move)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+
+class MobilityOrdering:
+    """Order moves by the number of onward knight moves from the destination,
+    fewest first (Warnsdorff's rule), after the best move from a previous
+    search of the node. This needs no state and costs one `Board.mobility()`
+    call per move.
+    """
+
+    def new_search(self):
+        pass
+
+    def order(self, game, moves, ply, best_move=None):
+        return promote(sorted(moves, key=game.mobility), best_move)
+
+    def cutoff(self, game, move, ply, depth):
+        pass
+
+
+ORDERINGS = {"killers": KillerOrdering, "mobility": MobilityOrdering}
@@ -0,0 +1,118 @@
+"""This file contains the opening book of `CustomPlayer`: an offline builder
+that deep-searches the first positions of the game, and the reader that
+`CustomPlayer.get_move` consults before searching.
+
+The first plies are the most expensive to search, since a player that has not
+moved yet can move to any blank cell. They are also the most symmetric: the
+positions are folded under the symmetries of the board (8 on a square board,
+see `isolation.symmetry`) and only their canonical form is searched and
+stored, with the best move in the canonical frame.
+
+The book file is indexed by the canonical position keys:
+
+    header : magic (6s), width (B), height (B), plies (B), entries (I)
+    keys   : the sorted position keys (Q each)
+    moves  : the best move of each position, as a cell index (B each)
+"""
+import struct
+
+from isolation import BitBoard
+from isolation.symmetry import canonical_position, inverse
+
+MAGIC = b"ISOBK1"
+HEADER = struct.Struct("<6sBBBI")
+
+
+def build_book(path, player_1, player_2, depth=4, plies=2, width=7, height=7):
+    """Search every position of the first plies of the game (up to symmetry)
+    and write their best moves to an opening book file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the book file.
+
+    player_1, player_2 : `game_agent.CustomPlayer`
+        The players searching the positions of the first and second player
+        (e.g. two instances with the same settings).
+
+    depth : int (optional)
+        The depth of the search of every position.
+
+    plies : int (optional)
+        The book holds the positions with fewer than `plies` moves played.
+
+    width, height : int (optional)
+        The dimensions of the board.
+
+    Returns
+    -------
+    int
+        The number of positions in the book.
+    """
+    book = {}
+    positions = [BitBoard(player_1, player_2, width, height)]
+    for ply in range(plies):
+        next_positions = []
+        for game in positions:
+            key, transform = canonical_position(game)
+            if key in book:
+                continue
+            player = game.active_player
+            player.time_left = lambda: float("inf")
+            player.pv_move = None
+            _, move = player.dosearch(game, depth)
+            book[key] = transform[move[0] * width + move[1]]
+            next_positions.extend(game.forecast_move(m) for m in game.get_legal_moves())
+        positions = next_positions
+
+    keys = sorted(book)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, plies, len(keys)))
+        f.write(struct.pack("<{}Q".format(len(keys)), *keys))
+        f.write(struct.pack("<{}B".format(len(keys)), *(book[key] for key in keys)))
+    return len(keys)
+
+
+class OpeningBook:
+    """The positions of an opening book file, loaded in memory.
+
+    Parameters
+    ----------
+    path : str
+        The path of the book file written by build_book().
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, self.width, self.height, self.plies, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not an opening book file".format(path))
+        keys = struct.unpack_from("<{}Q".format(count), data, HEADER.size)
+        moves = struct.unpack_from("<{}B".format(count), data, HEADER.size + 8 * count)
+        self.moves = dict(zip(keys, moves))
+
+    def __len__(self):
+        return len(self.moves)
+
+    def lookup(self, game):
+        """Return the book move for the position of `game`, or None if the
+        position is not in the book.
+        """
+        if game.move_count >= self.plies or game.width != self.width or game.height != self.height:
+            return None
+        key, transform = canonical_position(game)
+        cell = self.moves.get(key)
+        if cell is None:
+            return None
+        return divmod(inverse(transform)[cell], self.width)
+
+
+if __name__ == "__main__":
+    from game_agent import CustomPlayer
+    from scorefunctions import improved_score
+
+    players = [CustomPlayer(7, improved_score, False, 'alphabeta', inplace=True,
+                            ordering='killers', tt_size=1 << 18) for _ in range(2)]
+    print("{} positions".format(build_book("openingbook-7x7.bin", *players, depth=7)))
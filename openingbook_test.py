@@ -0,0 +1,55 @@
+"""
+This file contains test cases for the opening book of openingbook.py: the
+book must fold the openings that differ by a symmetry of the board together,
+and map its moves back onto the position played.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.symmetry import canonical_position, cell_transforms
+from openingbook import build_book
+from scorefunctions import improved_score
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_book(self):
+        """ Test that the book folds symmetric openings and maps its moves back """
+        path = os.path.join(self.workdir, "openingbook-5x5.bin")
+        players = [game_agent.CustomPlayer(2, improved_score, False, "alphabeta") for _ in range(2)]
+        # The empty board, and the 6 first moves that differ by symmetry
+        self.assertEqual(7, build_book(path, *players, depth=2, width=5, height=5))
+
+        agentUT = game_agent.CustomPlayer(2, improved_score, True, "alphabeta", book=path)
+        book = agentUT.book
+        board = isolation.BitBoard(agentUT, "null_agent", 5, 5)
+        move = agentUT.get_move(board, board.get_legal_moves(), lambda: 1e3)
+        self.assertIn(move, board.get_legal_moves())
+        self.assertEqual(0, agentUT.nodes)
+
+        board = isolation.BitBoard("null_agent", agentUT, 5, 5)
+        for first in board.get_legal_moves():
+            reply = book.lookup(board.forecast_move(first))
+            self.assertIn(reply, board.forecast_move(first).get_legal_moves())
+            expected = canonical_position(board.forecast_move(first).forecast_move(reply))[0]
+            # The reply to a symmetric move is a symmetric reply
+            for transform in cell_transforms(5, 5):
+                image = board.forecast_move(divmod(transform[first[0] * 5 + first[1]], 5))
+                image.apply_move(book.lookup(image))
+                self.assertEqual(expected, canonical_position(image)[0])
+        self.assertIsNone(book.lookup(board.forecast_move((0, 0)).forecast_move((1, 2))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""This file contains the opening suite of tournament.py: a fixed set of
+opening positions that every pairing of agents plays through, each position
+once with each agent moving first, so that the agents of a tournament are
+compared on the same positions instead of random ones.
+
+The suite holds the positions after the first plies of the game, one per
+class of positions equivalent under the symmetries of the board (see
+`isolation.symmetry`), and only the balanced ones: the players have about
+the same number of moves. It is stored as JSON:
+
+    {"width": 7, "height": 7, "plies": 2, "openings": [[[row, col], ...], ...]}
+"""
+import json
+import random
+
+from isolation import BitBoard
+from isolation.symmetry import canonical_position
+
+
+def generate_suite(path, plies=2, width=7, height=7, max_imbalance=1, count=None, seed=0):
+    """Write the balanced, symmetry-reduced opening positions of a board to
+    a suite file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the suite file.
+
+    plies : int (optional)
+        The number of moves of the openings.
+
+    width, height : int (optional)
+        The dimensions of the board.
+
+    max_imbalance : int (optional)
+        The largest difference between the number of moves of the two
+        players in the positions kept.
+
+    count : int (optional)
+        The number of openings kept, drawn at random (with `seed`) from the
+        balanced ones; None keeps them all.
+
+    seed : int (optional)
+        The seed of the draw.
+
+    Returns
+    -------
+    list<list<(int, int)>>
+        The openings of the suite.
+    """
+    positions = {}
+    games = [([], BitBoard("Player1", "Player2", width, height))]
+    for ply in range(plies):
+        next_games = []
+        for opening, game in games:
+            for move in game.get_legal_moves():
+                child = game.forecast_move(move)
+                key, _ = canonical_position(child)
+                if key not in positions:
+                    positions[key] = opening + [move]
+                    next_games.append((opening + [move], child))
+        games = next_games
+
+    openings = []
+    for opening, game in games:
+        own_moves = len(game.get_legal_moves(game.active_player))
+        opp_moves = len(game.get_legal_moves(game.inactive_player))
+        if own_moves and opp_moves and abs(own_moves - opp_moves) <= max_imbalance:
+            openings.append(opening)
+    if count is not None and count < len(openings):
+        openings = sorted(random.Random(seed).sample(openings, count))
+
+    with open(path, "w") as f:
+        json.dump({"width": width, "height": height, "plies": plies, "openings": openings}, f)
+    return openings
+
+
+def load_suite(path):
+    """Read the openings of a suite file written by generate_suite().
+
+    Returns
+    -------
+    list<tuple<(int, int)>>
+        The moves of every opening.
+    """
+    with open(path) as f:
+        suite = json.load(f)
+    return [tuple(tuple(move) for move in opening) for opening in suite["openings"]]
+
+
+if __name__ == "__main__":
+    print("{} openings".format(len(generate_suite("openings-7x7.json"))))
@@ -0,0 +1,245 @@
+"""This file contains the root-splitting search used by `CustomPlayer` to
+search on several CPU cores.
+
+Every iteration of iterative deepening hands the moves of the root to a pool
+of worker processes, one task per move, the best move of the previous
+iteration first. Each worker searches the position after its move with
+alphabeta and a window starting at the best score found so far by any worker
+(the shared alpha bound), so the moves searched after a good one are cut off
+as quickly as in the sequential search. The iteration is complete when every
+move has been searched.
+
+The workers stop at an absolute deadline (on the monotonic clock, shared by
+all the processes) computed from `time_left()`. Each worker builds its own
+player from the parameters of the searching player once, when it starts, and
+keeps its transposition table between tasks: a task only carries the board,
+with the players replaced by placeholders.
+
+Lazy SMP (helpers searching the whole tree, sharing one transposition table
+through shared memory) is not implemented: the table is a Python object, and
+sharing it between processes would cost more than it saves at these depths.
+"""
+import logging
+import time
+
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import Array
+
+from moveordering import promote
+
+logger = logging.getLogger('customplayer')
+
+_shared = None      # The shared [generation, alpha] array of the worker process
+_worker = {}        # The player of the worker process and the root of its table
+
+PLAYER, OPPONENT = "player", "opponent"     # The placeholders of the board of a task
+
+
+def _init_worker(shared, params):
+    from game_agent import CustomPlayer
+
+    global _shared
+    _shared = shared
+    _worker.update(player=CustomPlayer(**params), root=None)
+
+
+def replace_players(game, players):
+    """Return a copy of `game` with its players replaced according to the
+    `players` dict (e.g. by the placeholders of the boards sent to the
+    workers, which would otherwise pickle the players along).
+    """
+    board = game.copy()
+    for name in ("__player_1__", "__player_2__", "__active_player__", "__inactive_player__"):
+        value = getattr(board, name)
+        setattr(board, name, players.get(value, value))
+    for name in ("__last_player_move__", "__player_symbols__", "__location_keys__"):
+        setattr(board, name, {players.get(key, key): value for key, value in getattr(board, name).items()})
+    board.__features__ = None
+    return board
+
+
+def _search_root_move(game, move, depth, generation, deadline):
+    """Search the position after the root move `move` of `game` to the given
+    depth, in a worker process. The player to move in `game` is the
+    placeholder PLAYER, replaced by the player of the worker.
+
+    Returns
+    -------
+    (tuple(int, int), float, bool, int)
+        The move, its score (None if the search ran out of time), whether the
+        score is exact (it is only an upper bound if it did not beat the
+        shared alpha) and the number of nodes searched.
+    """
+    from game_agent import Timeout
+
+    player = _worker["player"]
+    game = replace_players(game, {PLAYER: player})
+    player.time_left = lambda: 1000. * (deadline - time.monotonic())
+    if player.tt is not None:
+        # Start a new table for every root position, unless it is kept
+        root = (game.hash(), game.move_count)
+        if _worker["root"] != root:
+            player.prepare_tt(game)
+            _worker["root"] = root
+
+    alpha = float("-inf")
+    if player.method != 'minimax':
+        with _shared.get_lock():
+            if _shared[0] == generation:
+                alpha = _shared[1]
+    player.root_move_count = game.move_count
+    player.nodes = 0
+    player.next_clock_check = 0
+    player.last_clock_check = None
+    player.null_window_search = player.method == 'pvs'
+    child = game.forecast_move(move)
+    try:
+        if player.method == 'minimax':
+            score, _ = player.minimax(child, depth - 1, maximizing_player=False)
+        else:
+            score, _ = player.alphabeta(child, depth - 1, alpha, float("inf"), maximizing_player=False)
+    except Timeout:
+        return move, None, False, player.nodes
+
+    with _shared.get_lock():
+        if _shared[0] == generation and score > _shared[1]:
+            _shared[1] = score
+    return move, score, score > alpha or alpha == float("-inf"), player.nodes
+
+
+class RootSplitter:
+    """Search the root moves in parallel on a pool of worker processes.
+
+    The pool is started on the first search and kept until `shutdown()`.
+
+    Parameters
+    ----------
+    workers : int
+        The number of worker processes.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = None
+        self.shared = None
+        self.generation = 0
+
+    def start(self, player):
+        """Start the worker processes, each with a copy of `player` built
+        from its parameters (without pondering, worker processes or book).
+        """
+        if self.pool is None:
+            self.shared = Array('d', [0., float("-inf")])
+            params = dict(player.params, ponder=False, workers=1, book=None)
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.shared, params))
+
+    def shutdown(self):
+        """ Stop the worker processes """
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+
+    def search(self, player, game, depth):
+        """Search `game` to the given depth for `player`, splitting the root
+        moves between the workers.
+
+        Returns
+        -------
+        float
+            The score of the best move
+
+        tuple(int, int)
+            The best move; (-1, -1) for no legal moves
+
+        Raises
+        ------
+        Timeout
+            If the time left falls below the player's TIMER_THRESHOLD before
+            every root move was searched. `player.root_best` is then set to
+            the best move searched, if the best move of the previous
+            iteration was among them.
+        """
+        from game_agent import Timeout
+
+        self.start(player)
+        player.root_best = None
+        legal_moves = game.get_legal_moves()
+        if depth <= 0 or not legal_moves:
+            return player.dosearch(game, depth)
+        if player.ordering is not None:
+            legal_moves = player.ordering.order(game, legal_moves, 0, player.pv_move)
+        legal_moves = promote(legal_moves, player.pv_move)
+        if player.symmetry_plies > 0:
+            legal_moves = player.unique_moves(game, legal_moves)
+
+        self.generation += 1
+        with self.shared.get_lock():
+            self.shared[0], self.shared[1] = self.generation, float("-inf")
+        # The workers stop TIMER_THRESHOLD ms before the deadline, which
+        # leaves as much again to collect their results and return
+        remaining = player.time_left() - player.TIMER_THRESHOLD
+        deadline = time.monotonic() + remaining / 1000.
+        board = replace_players(game, {player: PLAYER, game.get_opponent(player): OPPONENT})
+        futures = [self.pool.submit(_search_root_move, board, move, depth, self.generation, deadline)
+                   for move in legal_moves]
+        done, pending = wait(futures, timeout=max(0., remaining / 1000.))
+
+        results = {}
+        for future in done:
+            move, score, exact, nodes = future.result()
+            player.nodes += nodes
+            if score is not None:
+                results[move] = (score, exact)
+        # A bound did not beat the score of another move, so the best move
+        # is the best exact score
+        best = None
+        for move in legal_moves:
+            score, exact = results.get(move, (None, False))
+            if exact and (best is None or score > best[0]):
+                best = (score, move)
+
+        if pending or len(results) < len(legal_moves):
+            for future in pending:
+                future.cancel()
+            if player.partial_results and player.pv_move in results:
+                player.root_best = best
+            raise Timeout()
+        return best
+
+
+def benchmark(worker_counts=(1, 2, 4, 8), time_limit=1000., num_positions=5):
+    """Print the depth reached and the nodes per second of iterative
+    deepening with each number of workers, from the same positions.
+    """
+    import random
+    import timeit
+
+    from isolation import BitBoard
+    from game_agent import CustomPlayer
+    from scorefunctions import improved_score
+
+    for workers in worker_counts:
+        player = CustomPlayer(1, improved_score, True, 'alphabeta', tt_size=1 << 16,
+                              ordering='killers', workers=workers)
+        rng = random.Random(0)
+        depths, nodes, elapsed = [], 0, 0.
+        try:
+            for _ in range(num_positions):
+                board = BitBoard(player, "opponent")
+                while board.move_count < 6 or board.active_player != player:
+                    board.apply_move(rng.choice(board.get_legal_moves()))
+                started = timeit.default_timer()
+                time_left = lambda: time_limit - 1000 * (timeit.default_timer() - started)
+                player.get_move(board, board.get_legal_moves(), time_left)
+                elapsed += timeit.default_timer() - started
+                depths.append(player.depth_reached)
+                nodes += player.nodes
+        finally:
+            player.close()
+        print("{:2d} workers: mean depth {:.1f}, {:.0f} nodes/s".format(
+            workers, sum(depths) / len(depths), nodes / elapsed))
+
+
+if __name__ == "__main__":
+    benchmark()
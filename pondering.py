@@ -0,0 +1,157 @@
+"""This file contains the ponderer used by `CustomPlayer` to keep searching
+while the opponent is thinking about its move.
+
+After `CustomPlayer.get_move` picks a move, the ponderer searches, in a
+background thread, the position reached by every reply of the opponent, with
+iterative deepening over all the replies (the reply predicted by the
+transposition table first). When the opponent has moved, the next call to
+`get_move` stops the thread, looks up the result for the position it was
+given, and resumes iterative deepening from there; the transposition table and
+the move-ordering tables it warmed up are shared with the player. The thread
+reads its stop event at every node, and `get_move` waits for it to exit
+before searching, so the tables are never written by both searches at once.
+
+The thread competes with the other threads of the process for the GIL, so an
+opponent playing in the same process (e.g. in `Board.play`, as in the
+tournaments of tournament.py) loses part of its turn to the ponder search:
+matches between a pondering player and an in-process opponent are not fair.
+Pondering is meant for opponents that spend their turn outside the
+interpreter, e.g. in another process or a human.
+"""
+import logging
+import threading
+import time
+import timeit
+
+logger = logging.getLogger('customplayer')
+
+PONDER_LIMIT = 60000.   # Maximum duration of a ponder search (in milliseconds)
+YIELD_INTERVAL = 64     # Number of ponder nodes between offers of the GIL to the other threads
+
+
+class Ponderer:
+    """Search the replies of the opponent in a background thread.
+
+    Parameters
+    ----------
+    player : `game_agent.CustomPlayer`
+        The player to ponder for. The search runs on a shallow copy of the
+        player, so it shares its transposition table and move ordering.
+
+    limit : float (optional)
+        The maximum duration of a ponder search, in milliseconds, in case
+        nobody stops it.
+    """
+
+    def __init__(self, player, limit=PONDER_LIMIT):
+        self.player = player
+        self.limit = limit
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.results = {}
+        self.searcher = None
+
+    def start(self, game):
+        """Start pondering on `game`, the position after the move of the
+        player (the opponent to move). Any previous ponder search is stopped.
+        """
+        self.stop()
+        self.results = {}
+        self.stop_event = threading.Event()
+        self.searcher = self.make_searcher()
+        self.thread = threading.Thread(target=self.run, name="ponder",
+                                       args=(game.copy(), self.searcher, self.stop_event))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop the ponder search and wait for the thread to finish. The
+        search reads the stop event at every node, so it stops within a node,
+        and the player can use the shared tables as soon as this returns.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def lookup(self, game):
+        """Return the result of pondering the position of `game`.
+
+        Returns
+        -------
+        (int, float, tuple(int, int)) or None
+            The depth, score and best move of the deepest search of the
+            position that completed, or None if it was not searched.
+        """
+        return self.results.get(game.hash())
+
+    def make_searcher(self):
+        """ Return the copy of the player that runs the ponder search """
+        player, score_fn = self.player, self.player.score
+        # (not copy.copy(), which drops the tables with __getstate__)
+        searcher = object.__new__(type(player))
+        searcher.__dict__.update(player.__dict__)
+        # The copy is not a player of the game: evaluate, solve and look up
+        # the positions for the player itself
+        searcher.score = lambda game, _: score_fn(game, player)
+        searcher.perspective = player
+        searcher.ponderer = None
+        searcher.splitter = None
+        searcher.time_manager = None
+        searcher.max_overshoot = None
+        searcher.nodes = 0
+        searcher.next_clock_check = 0
+        searcher.last_clock_check = None
+        return searcher
+
+    def run(self, game, searcher, stop_event):
+        """Search the position reached by every reply of the opponent with
+        iterative deepening, until `stop_event` is set or the limit expires.
+        """
+        from game_agent import Timeout
+
+        deadline = timeit.default_timer() + self.limit / 1000.
+        next_yield = 0
+
+        def time_left():
+            # Offer the GIL to the other threads every YIELD_INTERVAL nodes
+            # (this makes them wait less for it, but they still share it
+            # with this one)
+            nonlocal next_yield
+            if searcher.nodes >= next_yield:
+                time.sleep(0)
+                next_yield = searcher.nodes + YIELD_INTERVAL
+            if stop_event.is_set():
+                return -1.
+            return 1000. * (deadline - timeit.default_timer())
+
+        time.sleep(0)
+        searcher.time_left = time_left
+
+        replies = self.order_replies(game, game.get_legal_moves())
+        boards = [game.forecast_move(reply) for reply in replies]
+        max_depth = max(searcher.search_depth, game.get_blank_spaces_count() - 1)
+        searched = 0
+        try:
+            for depth in range(searcher.search_depth, max_depth + 1):
+                for board in boards:
+                    if not board.get_legal_moves():
+                        continue
+                    key = board.hash()
+                    previous = self.results.get(key)
+                    searcher.pv_move, searcher.pv_score = (previous[2], previous[1]) if previous else (None, 0.)
+                    score, move = searcher.dosearch(board, depth)
+                    self.results[key] = (depth, score, move)
+                    searched += 1
+        except Timeout:
+            pass
+        logger.debug("Pondered %d searches of %d replies, %d nodes", searched, len(boards), searcher.nodes)
+
+    def order_replies(self, game, replies):
+        """ Search the reply predicted by the transposition table first """
+        tt = self.player.tt
+        if tt is not None:
+            entry = tt.probe(game.hash())
+            if entry is not None and entry[4] in replies:
+                replies = [entry[4]] + [m for m in replies if m != entry[4]]
+        return replies
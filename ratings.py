@@ -0,0 +1,156 @@
+"""This file contains the statistics of agent comparisons used by
+tournament.py: Elo differences with error bars, the sequential probability
+ratio test (SPRT) that stops a pairing as soon as its result is clear, and the
+Bradley-Terry ratings of a set of agents from all their games.
+
+Isolation games cannot be drawn, so every game is a win or a loss, and the
+expected score of an agent rated `elo` points above its opponent is
+1 / (1 + 10 ** (-elo / 400)).
+"""
+import math
+
+Z_95 = 1.96     # Half-width of the 95% confidence interval, in standard errors
+ELO_PER_NATURAL_UNIT = 400. / math.log(10)
+
+
+def expected_score(elo):
+    """ Return the expected score of an agent rated `elo` points above its opponent """
+    return 1. / (1. + 10. ** (-elo / 400.))
+
+
+def elo(wins, losses):
+    """
+    Estimate the Elo difference between two agents from their games.
+
+    Parameters
+    ----------
+    wins, losses : int
+        The number of games won and lost by the first agent.
+
+    Returns
+    ----------
+    (float, float)
+        The Elo difference and the half-width of its 95% confidence interval
+        (inf if no game was played). Half a game is added to each side, so
+        that a perfect score gives a finite estimate.
+    """
+    games = wins + losses
+    if games == 0:
+        return 0., float("inf")
+    score = (wins + .5) / (games + 1.)
+    difference = -400. * math.log10(1. / score - 1.)
+    # Delta method: d(elo) / d(score) = 400 / (ln(10) * score * (1 - score))
+    error = math.sqrt(score * (1. - score) / games)
+    return difference, Z_95 * error * ELO_PER_NATURAL_UNIT / (score * (1. - score))
+
+
+class SPRT:
+    """Sequential probability ratio test between two Elo hypotheses.
+
+    H0: the agent is `elo0` points above its opponent, H1: it is `elo1`
+    points above. The test accepts one of them as soon as the log-likelihood
+    ratio of the games played leaves the bounds set by the error rates.
+
+    Parameters
+    ----------
+    elo0, elo1 : float (optional)
+        The Elo differences of the hypotheses (elo0 < elo1).
+
+    alpha, beta : float (optional)
+        The probability of accepting H1 when H0 is true, and of accepting H0
+        when H1 is true.
+    """
+
+    def __init__(self, elo0=0., elo1=100., alpha=.05, beta=.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        p0, p1 = expected_score(elo0), expected_score(elo1)
+        self.win_llr = math.log(p1 / p0)
+        self.loss_llr = math.log((1. - p1) / (1. - p0))
+        self.lower = math.log(beta / (1. - alpha))
+        self.upper = math.log((1. - beta) / alpha)
+        self.wins = 0
+        self.losses = 0
+
+    def update(self, wins, losses):
+        """ Add the result of some games, and return status() """
+        self.wins += wins
+        self.losses += losses
+        return self.status()
+
+    def llr(self):
+        """ Return the log-likelihood ratio of H1 over H0 of the games so far """
+        return self.wins * self.win_llr + self.losses * self.loss_llr
+
+    def status(self):
+        """ Return 'H1' or 'H0' once the test accepts it, None until then """
+        llr = self.llr()
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+
+def bradley_terry(results, iterations=200, tolerance=1e-9):
+    """
+    Fit the Bradley-Terry ratings of a set of agents to their games, with
+    the minorization-maximization algorithm (Hunter, 2004).
+
+    Parameters
+    ----------
+    results : dict<(object, object), int>
+        The number of games won by the first agent of every pair against
+        the second.
+
+    iterations : int (optional)
+        The maximum number of iterations.
+
+    tolerance : float (optional)
+        The iterations stop once no rating moves by more than this (in
+        natural units).
+
+    Returns
+    ----------
+    dict<object, (float, float)>
+        The Elo rating of every agent (the ratings average to 0) and the
+        half-width of its 95% confidence interval (inf for an agent without
+        games). Half a win is added each way to every pair that played, so
+        that an agent that won or lost every game gets a finite rating.
+    """
+    wins = {}
+    games = {}
+    for (a, b), count in results.items():
+        for agent in (a, b):
+            wins.setdefault(agent, 0.)
+            games.setdefault(agent, {})
+        wins[a] += count
+        games[a][b] = games[a].get(b, 0.) + count
+        games[b][a] = games[b].get(a, 0.) + count
+    for a in games:
+        for b in games[a]:
+            if games[a][b]:
+                wins[a] += .5
+                games[a][b] += 1.
+    strength = {agent: 1. for agent in games}
+    for _ in range(iterations):
+        updated = {}
+        for a in games:
+            denominator = sum(n / (strength[a] + strength[b]) for b, n in games[a].items())
+            updated[a] = wins[a] / denominator if denominator else strength[a]
+        # Scale to a geometric mean of 1
+        scale = math.exp(sum(math.log(s) for s in updated.values()) / len(updated))
+        updated = {agent: s / scale for agent, s in updated.items()}
+        change = max(abs(math.log(updated[a] / strength[a])) for a in games)
+        strength = updated
+        if change < tolerance:
+            break
+
+    ratings = {}
+    for a in games:
+        # Inverse of the diagonal of the Fisher information
+        information = sum(n * strength[a] * strength[b] / (strength[a] + strength[b]) ** 2
+                          for b, n in games[a].items())
+        error = Z_95 * ELO_PER_NATURAL_UNIT / math.sqrt(information) if information else float("inf")
+        ratings[a] = (ELO_PER_NATURAL_UNIT * math.log(strength[a]), error)
+    return ratings
@@ -0,0 +1,46 @@
+"""
+This file contains test cases for the statistics of ratings.py: the Elo
+estimates, the sequential probability ratio test and the Bradley-Terry
+ratings.
+"""
+import random
+import unittest
+
+from ratings import SPRT, bradley_terry, elo, expected_score
+
+
+class RatingsTest(unittest.TestCase):
+
+    def test_sprt(self):
+        """ Test that the SPRT stops early on clear results only """
+        rng = random.Random(0)
+        for true_elo, expected in ((400, 'H1'), (-200, 'H0')):
+            test = SPRT(elo0=0, elo1=150)
+            games = 0
+            while test.status() is None:
+                win = rng.random() < expected_score(true_elo)
+                test.update(win, 1 - win)
+                games += 1
+            self.assertEqual(expected, test.status())
+            self.assertLess(games, 50)
+        self.assertIsNone(SPRT(elo0=0, elo1=150).update(6, 4))
+
+    def test_ratings(self):
+        """ Test the Elo estimates and the Bradley-Terry ratings """
+        difference, error = elo(15, 5)
+        self.assertAlmostEqual(expected_score(difference), 15.5 / 21)
+        self.assertLess(elo(150, 50)[1], error)
+        self.assertEqual((0., float("inf")), elo(0, 0))
+        # Two agents: the ratings are the Elo difference, split around 0
+        ratings = bradley_terry({("a", "b"): 15, ("b", "a"): 5})
+        self.assertAlmostEqual(difference, ratings["a"][0] - ratings["b"][0], places=3)
+        self.assertAlmostEqual(0., ratings["a"][0] + ratings["b"][0], places=6)
+        # Transitive results give ordered ratings
+        ratings = bradley_terry({("a", "b"): 30, ("b", "a"): 10, ("b", "c"): 30,
+                                 ("c", "b"): 10, ("a", "c"): 36, ("c", "a"): 4})
+        self.assertGreater(ratings["a"][0], ratings["b"][0])
+        self.assertGreater(ratings["b"][0], ratings["c"][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""This file contains the result store of tournament.py: an SQLite database
+that keeps every finished game, so that an interrupted tournament loses no
+more than the games of its last batch, and a rerun of the same configuration
+only plays the matches it does not have yet.
+
+Every game is recorded with its configuration (a string naming the
+tournament settings and the players, see `tournament.pairing_config()`), its
+match (a string naming the match within the configuration), its number in
+the match (0 or 1), the names of the players in move order, the seed and the
+opening moves of the match, the moves of the game (the move history of
+`Board.play`), the winner, the reason the game ended and the time each move
+took (in milliseconds). Lists are stored as JSON.
+"""
+import json
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    config TEXT NOT NULL,
+    match TEXT NOT NULL,
+    game INTEGER NOT NULL,
+    first TEXT NOT NULL,
+    second TEXT NOT NULL,
+    seed TEXT,
+    opening TEXT NOT NULL,
+    moves TEXT NOT NULL,
+    winner TEXT,
+    termination TEXT NOT NULL,
+    move_times TEXT NOT NULL,
+    PRIMARY KEY (config, match, game)
+)
+"""
+
+COLUMNS = ("first", "second", "seed", "opening", "moves", "winner", "termination", "move_times")
+JSON_COLUMNS = ("opening", "moves", "move_times")
+
+
+class ResultStore:
+    """The games of the tournaments recorded in an SQLite file.
+
+    The games are written in batches: add() keeps them in memory until
+    `batch` games are waiting, and flush() (or close()) writes them in one
+    transaction. The games of a match are always written together.
+
+    Parameters
+    ----------
+    path : str
+        The path of the database file, created if needed.
+
+    batch : int (optional)
+        The number of games kept in memory before they are written.
+    """
+
+    def __init__(self, path, batch=50):
+        self.path = path
+        self.batch = batch
+        self.pending = []
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """ Write the games waiting in memory and close the database """
+        self.flush()
+        self.connection.close()
+
+    def add(self, config, match, games):
+        """Record the games of a finished match.
+
+        Parameters
+        ----------
+        config : str
+            The configuration of the tournament.
+
+        match : str
+            The match within the configuration.
+
+        games : list<dict>
+            The games of the match, in order, as dicts with the keys of
+            COLUMNS.
+        """
+        for number, game in enumerate(games):
+            row = [config, match, number]
+            for column in COLUMNS:
+                row.append(json.dumps(game[column]) if column in JSON_COLUMNS else game[column])
+            self.pending.append(row)
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        """ Write the games waiting in memory """
+        if self.pending:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO games VALUES ({})".format(", ".join("?" * (3 + len(COLUMNS)))),
+                    self.pending)
+            self.pending = []
+
+    def matches(self, config):
+        """Return the games recorded for a configuration.
+
+        Returns
+        -------
+        dict<str, list<dict>>
+            The games of every match recorded, in order, as dicts with the
+            keys of COLUMNS (the JSON lists are decoded as lists).
+        """
+        self.flush()
+        matches = {}
+        rows = self.connection.execute(
+            "SELECT match, {} FROM games WHERE config = ? ORDER BY match, game".format(", ".join(COLUMNS)),
+            (config,))
+        for row in rows:
+            game = dict(zip(COLUMNS, row[1:]))
+            for column in JSON_COLUMNS:
+                game[column] = json.loads(game[column])
+            matches.setdefault(row[0], []).append(game)
+        return matches
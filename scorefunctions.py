@@ -2,7 +2,14 @@
 Created on Mar 5, 2017
 
 @author: safdar
+
+The score functions read the game state through the features of the board
+(see features.py), extracted once per game state and shared by every score
+function evaluated on it.
 '''
+from features import get_features
+from isolation.bitboard import knight_tables, popcount
+from territory import articulation_points, first_moves, knight_distance, knight_shifts, reachable, voronoi
 
 INFINITY = float('inf')
 
@@ -27,14 +34,7 @@ def null_score(game, player):
     float
         The heuristic value of the current game state.
     """
-
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
-
-    return 0.
+    return float(get_features(game).outcome(player))
 
 
 def open_move_score(game, player):
@@ -57,13 +57,12 @@ def open_move_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
+    features = get_features(game)
+    outcome = features.outcome(player)
+    if outcome:
+        return outcome
 
-    if game.is_winner(player):
-        return float("inf")
-
-    return float(len(game.get_legal_moves(player)))
+    return float(len(features.own_moves(player)))
 
 
 def improved_score(game, player):
@@ -87,14 +86,13 @@ def improved_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    features = get_features(game)
+    outcome = features.outcome(player)
+    if outcome:
+        return outcome
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = len(features.own_moves(player))
+    opp_moves = len(features.opp_moves(player))
     return float(own_moves - opp_moves)
 
 #################################################################
@@ -156,13 +154,10 @@ def combo_netadvantage_nearopponent_score(game, player):
     return score
 
 def game_stage(game):
-    total_spaces = game.width * game.height
-    remaining_spaces = game.get_blank_spaces_count()
-    assert total_spaces >= remaining_spaces
-    percent_remaining = 100 * ((total_spaces - remaining_spaces) / total_spaces)
-    return 100 - percent_remaining
+    return get_features(game).stage
 
-# Number of hops between two positions on the board
+# Rough estimate of the number of hops between two positions on the board.
+# Deprecated: the score functions use the exact territory.knight_distance()
 def gethopdistance(x, y):
     dx = abs(x[0] - y[0])
     dy = abs(x[1] - y[1])
@@ -171,30 +166,28 @@ def gethopdistance(x, y):
 
 # Just check if the player won or lose, or neither
 def winlose_score(game, player):
-    if game.is_loser(player):
-        return float("-inf")
-    if game.is_winner(player):
-        return float("inf")
-    return 0
+    return get_features(game).outcome(player)
 
 def net_advantage_score(game, player):
-    score = winlose_score(game, player)
+    features = get_features(game)
+    score = features.outcome(player)
     if -INFINITY < score < INFINITY:
-        own_moves = game.get_legal_moves(player)
-        opp_moves = game.get_legal_moves(game.get_opponent(player))
-        if game.active_player == player:
-            score += float(len(own_moves) - len(opp_moves))
+        own_moves = len(features.own_moves(player))
+        opp_moves = len(features.opp_moves(player))
+        if features.active == player:
+            score += float(own_moves - opp_moves)
         else: # It' the opponent's turn, so revise the options a bit
-            score += float(len([x for x in own_moves if x not in opp_moves]) - len(opp_moves))
+            score += float(own_moves - features.overlap - opp_moves)
     return score
 
 # Has more move options than opponent
 def net_mobility_score(game, player):
-    score = winlose_score(game, player)
+    features = get_features(game)
+    score = features.outcome(player)
     if -INFINITY < score < INFINITY:
-        own_moves = len(game.get_legal_moves(player))
-        opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
-        if player == game.active_player:
+        own_moves = len(features.own_moves(player))
+        opp_moves = len(features.opp_moves(player))
+        if player == features.active:
             if own_moves > opp_moves:
                 score += 2              # Active player so extra adv
             elif own_moves < opp_moves:
@@ -209,26 +202,25 @@ def net_mobility_score(game, player):
     
 # Has overlap with opponent's next options
 def offensive_score(game, player):
-    score = winlose_score(game, player)
+    features = get_features(game)
+    score = features.outcome(player)
     if -INFINITY < score < INFINITY:
-        own_moves = game.get_legal_moves(player)
-        opp_moves = game.get_legal_moves(game.get_opponent(player))
-        current_overlap = [x for x in own_moves if x in opp_moves]
-        if player == game.active_player:
-            if len(current_overlap) > 0:
+        if player == features.active:
+            if features.overlap > 0:
                 score += 1  # We are at an advantage
         else:
-            if len(current_overlap) > 0:
+            if features.overlap > 0:
                 score -= 1  # We are at a disadvantage
     return score
 
 # Distance from the center of the board
 def accessibility_score(game, player):
-    score = winlose_score(game, player)
+    features = get_features(game)
+    score = features.outcome(player)
     if -INFINITY < score < INFINITY:
-        center = (round(game.height / 2), round(game.width / 2))
-        own_location = game.get_player_location(player)
-        delta = gethopdistance(own_location, center)
+        center = (round(features.height / 2), round(features.width / 2))
+        own_location = features.location(player)
+        delta = knight_distance(features.width, features.height, own_location, center)
         if delta < round(center[0]/2):
             score += 1
         elif delta > round(center[0]/2):
@@ -250,13 +242,72 @@ def accessibility_score(game, player):
 #         total_moves = own_moves + opp_moves
 #     return score
 
+# Number of cells each player can still reach (whatever the other does)
+def territory_score(game, player):
+    features = get_features(game)
+    score = features.outcome(player)
+    if -INFINITY < score < INFINITY:
+        opponent = features.opponent(player)
+        shifts = knight_shifts(game.width, game.height)
+        blank = game.get_blank_mask()
+        own_region = reachable(shifts, first_moves(game, player, blank), blank)
+        opp_region = reachable(shifts, first_moves(game, opponent, blank), blank)
+        score += float(popcount(own_region) - popcount(opp_region))
+    return score
+
+# Number of cells each player reaches before the other
+def voronoi_score(game, player):
+    features = get_features(game)
+    score = features.outcome(player)
+    if -INFINITY < score < INFINITY:
+        opponent = features.opponent(player)
+        shifts = knight_shifts(game.width, game.height)
+        blank = game.get_blank_mask()
+        own, opp = voronoi(shifts, first_moves(game, player, blank), first_moves(game, opponent, blank), blank)
+        score += float(popcount(own) - popcount(opp))
+    return score
+
+# Voronoi territory, minus the bottlenecks of each region: the cells behind a
+# bottleneck are cut off by a single opponent move
+def bottleneck_score(game, player):
+    score = voronoi_score(game, player)
+    if -INFINITY < score < INFINITY:
+        shifts = knight_shifts(game.width, game.height)
+        masks = knight_tables(game.width, game.height).masks
+        blank = game.get_blank_mask()
+        for who, sign in ((player, -0.5), (get_features(game).opponent(player), 0.5)):
+            location = game.get_player_location(who)
+            if location is not None:
+                region = reachable(shifts, first_moves(game, who, blank), blank)
+                cell = location[0] * game.width + location[1]
+                score += sign * popcount(articulation_points(masks, cell, region))
+    return score
+
 # Proximity from each other: Closer = higher
 def proximity_score(game, player):
-    score = winlose_score(game, player)
+    features = get_features(game)
+    score = features.outcome(player)
     if -INFINITY < score < INFINITY:
-        own_location = game.get_player_location(player)
-        opp_location = game.get_player_location(game.get_opponent(player))
-        delta = gethopdistance(own_location, opp_location)
+        own_location = features.location(player)
+        opp_location = features.location(features.opponent(player))
+        delta = knight_distance(features.width, features.height, own_location, opp_location)
         score -= delta   # Since the knight moves in an L shape (so can jump 2 spaces net)
     return score
 
+# The score functions that give the same value to the positions that a
+# symmetry of the board maps onto each other, which CustomPlayer needs to skip
+# symmetric moves (see `symmetry_plies`). accessibility_score is not one of
+# them: its center is off the middle of the board when a side is odd.
+SYMMETRIC_SCORES = frozenset([null_score, open_move_score, improved_score, custom_score, winlose_score,
+                              net_advantage_score, net_mobility_score, offensive_score, proximity_score,
+                              territory_score, voronoi_score, bottleneck_score,
+                              combo_offensive_nearopponent_netmobility_score,
+                              combo_netadvantage_nearopponent_score])
+
+
+def is_symmetric(score_fn):
+    """Return whether a score function is known to give the same value to
+    symmetric positions: one of SYMMETRIC_SCORES, or a function with a true
+    `symmetric` attribute.
+    """
+    return score_fn in SYMMETRIC_SCORES or getattr(score_fn, "symmetric", False)
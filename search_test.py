@@ -0,0 +1,349 @@
+"""
+This file contains test cases for the search enhancements of CustomPlayer
+(transposition table, move ordering, alternative search methods, ...). Each
+enhancement must return the same minimax value as the plain search it
+accelerates.
+"""
+import pickle
+import random
+import time
+import timeit
+import unittest
+
+import isolation
+import game_agent
+
+from parallel import OPPONENT, PLAYER, replace_players
+from sample_players import RandomPlayer
+from scorefunctions import accessibility_score, improved_score
+from transposition import TranspositionTable, EXACT, LOWER
+
+
+def random_position(agentUT, seed, plies=6, width=7, height=7):
+    """Return a BitBoard with the agent under test to move after a few
+    random plies.
+    """
+    rng = random.Random(seed)
+    board = isolation.BitBoard(agentUT, "null_agent", width, height)
+    while board.move_count < plies or board.active_player != agentUT:
+        board.apply_move(rng.choice(board.get_legal_moves()))
+    return board
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_replacement(self):
+        """ Test the depth-preferred / always-replace bucket scheme """
+        tt = TranspositionTable(2)
+        tt.store(1, 5, EXACT, 1., (0, 0))
+        tt.store(2, 3, LOWER, 2., (0, 1))
+        self.assertEqual(tt.probe(1)[1:], (5, EXACT, 1., (0, 0)))
+        self.assertEqual(tt.probe(2)[1:], (3, LOWER, 2., (0, 1)))
+
+        # A shallower entry only replaces the always-replace slot
+        tt.store(3, 1, EXACT, 3., (0, 2))
+        self.assertIsNotNone(tt.probe(1))
+        self.assertIsNone(tt.probe(2))
+        self.assertIsNotNone(tt.probe(3))
+
+        # A deeper entry takes the depth-preferred slot and demotes its entry
+        tt.store(4, 7, EXACT, 4., (0, 3))
+        self.assertIsNotNone(tt.probe(4))
+        self.assertIsNotNone(tt.probe(1))
+        self.assertIsNone(tt.probe(3))
+
+        stats = tt.stats()
+        self.assertEqual(2, stats["entries"])
+        self.assertEqual(2, stats["evictions"])
+        self.assertEqual(4, stats["stores"])
+        self.assertEqual(2, stats["collisions"])
+
+
+class SearchTest(unittest.TestCase):
+
+    def assertSameValue(self, reference_args, args, depths=(1, 2, 3, 4), seeds=range(6)):
+        """Check that an agent built with `args` finds the same minimax value
+        as one built with `reference_args`, and returns a legal move.
+        """
+        for seed in seeds:
+            for depth in depths:
+                reference = game_agent.CustomPlayer(depth, improved_score, False, **reference_args)
+                agentUT = game_agent.CustomPlayer(depth, improved_score, False, **args)
+                for agent in (reference, agentUT):
+                    agent.time_left = lambda: 1e3
+                expected, _ = reference.dosearch(random_position(reference, seed), depth)
+                board = random_position(agentUT, seed)
+                score, move = agentUT.dosearch(board, depth)
+                self.assertEqual(expected, score)
+                self.assertIn(move, board.get_legal_moves())
+
+    def test_symmetric_moves(self):
+        """ Test that skipping symmetric moves keeps the value with fewer nodes """
+        for method in ("minimax", "alphabeta"):
+            for opening in ([], [(2, 2)], [(2, 2), (0, 2)]):
+                nodes = []
+                for symmetry_plies in (0, 2):
+                    agentUT = game_agent.CustomPlayer(3, improved_score, False, method,
+                                                      symmetry_plies=symmetry_plies)
+                    agentUT.time_left = lambda: 1e3
+                    board = isolation.BitBoard(agentUT, "null_agent", 5, 5)
+                    for move in opening:
+                        board.apply_move(move)
+                    if board.active_player != agentUT:
+                        board = isolation.BitBoard("null_agent", agentUT, 5, 5)
+                        for move in opening:
+                            board.apply_move(move)
+                    score, move = agentUT.dosearch(board, 3)
+                    self.assertIn(move, board.get_legal_moves())
+                    nodes.append((score, agentUT.nodes))
+                self.assertEqual(nodes[0][0], nodes[1][0])
+                self.assertLess(nodes[1][1], nodes[0][1])
+
+        # The symmetric moves are only skipped with a symmetric score function
+        self.assertEqual(0, game_agent.CustomPlayer(score_fn=accessibility_score, symmetry_plies=2).symmetry_plies)
+        self.assertEqual(2, game_agent.CustomPlayer(score_fn=improved_score, symmetry_plies=2).symmetry_plies)
+
+    def test_eval_cache(self):
+        """ Test the search with an evaluation cache """
+        self.assertSameValue({"method": "minimax"}, {"method": "minimax", "eval_cache": 1 << 10})
+        self.assertSameValue({"method": "alphabeta"},
+                             {"method": "alphabeta", "eval_cache": 1 << 10, "inplace": True})
+
+    def test_transposition_table(self):
+        """ Test alphabeta with a transposition table """
+        self.assertSameValue({"method": "minimax"},
+                             {"method": "alphabeta", "tt_size": 1 << 12, "inplace": True})
+
+    def test_move_ordering(self):
+        """ Test alphabeta with each move ordering strategy """
+        for ordering in ("killers", "mobility"):
+            self.assertSameValue({"method": "minimax"},
+                                 {"method": "alphabeta", "ordering": ordering})
+            self.assertSameValue({"method": "minimax"},
+                                 {"method": "alphabeta", "ordering": ordering,
+                                  "tt_size": 1 << 12, "inplace": True})
+
+    def test_pvs(self):
+        """ Test principal variation search """
+        self.assertSameValue({"method": "minimax"}, {"method": "pvs"})
+        self.assertSameValue({"method": "minimax"},
+                             {"method": "pvs", "ordering": "killers",
+                              "tt_size": 1 << 12, "inplace": True})
+
+    def test_mtdf(self):
+        """ Test MTD(f) search """
+        self.assertSameValue({"method": "minimax"}, {"method": "mtdf"})
+        self.assertSameValue({"method": "minimax"},
+                             {"method": "mtdf", "ordering": "killers",
+                              "tt_size": 1 << 12, "inplace": True})
+
+    def test_aspiration_windows(self):
+        """ Test that aspiration windows find the full-window value """
+        for method in ("alphabeta", "pvs"):
+            agentUT = game_agent.CustomPlayer(1, improved_score, True, method, aspiration=0.5,
+                                              ordering="killers", tt_size=1 << 12)
+            agentUT.time_left = lambda: 1e3
+            for seed in range(4):
+                board = random_position(agentUT, seed)
+                for depth in (2, 3, 4):
+                    expected, _ = agentUT.dosearch(board, depth)
+                    for guess in (expected - 3, expected, expected + 0.25, expected + 7):
+                        score, move = agentUT.aspiration_search(board, depth, guess)
+                        self.assertEqual(expected, score)
+                        self.assertIn(move, board.get_legal_moves())
+            stats = agentUT.aspiration_stats
+            self.assertGreater(stats["fail_low"], 0)
+            self.assertGreater(stats["fail_high"], 0)
+
+    def test_amortized_clock(self):
+        """ Test that the clock is read every N nodes without eating the margin """
+        agentUT = game_agent.CustomPlayer(1, improved_score, True, "alphabeta", timeout=10.,
+                                          max_overshoot=2., time_manager=False)
+        board = random_position(agentUT, 0)
+        reads = []
+
+        def time_left():
+            # Simulated clock: 200ms budget, 0.01ms per node
+            reads.append(agentUT.nodes)
+            return 200. - 0.01 * agentUT.nodes
+
+        move = agentUT.get_move(board, board.get_legal_moves(), time_left)
+        self.assertIn(move, board.get_legal_moves())
+        self.assertGreaterEqual(time_left(), agentUT.TIMER_THRESHOLD)
+        self.assertLess(len(reads), agentUT.nodes / 50)
+        intervals = [b - a for a, b in zip(reads, reads[1:])]
+        self.assertLessEqual(max(intervals) * 0.01, agentUT.max_overshoot + 0.01)
+
+    def test_partial_results(self):
+        """ Test that an interrupted iteration still returns its best root move """
+        evaluated = []
+
+        def score(game, player):
+            row, col = game.get_player_location(player)
+            evaluated.append((row, col))
+            return float(row * 7 + col)
+
+        for method in ("minimax", "alphabeta", "pvs"):
+            del evaluated[:]
+            agentUT = game_agent.CustomPlayer(1, score, False, method, partial_results=True)
+            board = isolation.Board(agentUT, "null_agent")
+            board.apply_move((3, 3))
+            board.apply_move((0, 0))
+            legal_moves = board.get_legal_moves()
+            move = agentUT.get_move(board, legal_moves, lambda: -1. if len(evaluated) >= 4 else 1e3)
+            self.assertEqual(max(legal_moves[:4]), move)
+
+    def test_partial_results_fail_low(self):
+        """ Test that the bounds of a failed aspiration window are not kept as partial results """
+        expired = []
+
+        def score(game, player):
+            move = game.get_player_location(player)
+            if game.move_count == 3:
+                # Depth 1: the first move is the best
+                return 0. if move == legal_moves[0] else -10.
+            # Depth 2: every move fails low, the second one by less, and
+            # the time runs out after it
+            if move == legal_moves[1]:
+                expired.append(move)
+                return -50.
+            return -100.
+
+        for method in ("alphabeta", "pvs"):
+            del expired[:]
+            agentUT = game_agent.CustomPlayer(1, score, True, method, aspiration=1., time_manager=False,
+                                              partial_results=True)
+            board = isolation.Board(agentUT, "null_agent")
+            board.apply_move((3, 3))
+            board.apply_move((0, 0))
+            legal_moves = board.get_legal_moves()
+            move = agentUT.get_move(board, legal_moves, lambda: -1. if expired else 1e3)
+            self.assertTrue(expired)
+            self.assertEqual(1, agentUT.depth_reached)
+            self.assertEqual(legal_moves[0], move)
+
+    def test_move_ordering_nodes(self):
+        """ Test that killer/history ordering reduces the nodes to depth """
+        nodes = []
+        for ordering in (None, "killers"):
+            agentUT = game_agent.CustomPlayer(1, improved_score, False, "alphabeta", ordering=ordering)
+            agentUT.time_left = lambda: 1e3
+            for seed in range(3):
+                board = random_position(agentUT, seed)
+                agentUT.pv_move = None
+                for depth in range(1, 7):
+                    _, agentUT.pv_move = agentUT.dosearch(board, depth)
+            nodes.append(agentUT.nodes)
+        self.assertLess(nodes[1], nodes[0])
+
+    def test_kept_transposition_table(self):
+        """ Test that a table kept across moves still returns legal moves """
+        agentUT = game_agent.CustomPlayer(1, improved_score, True, "alphabeta",
+                                          tt_size=1 << 12, keep_tt=True)
+        board = isolation.BitBoard(agentUT, "null_agent")
+        board.apply_move((3, 3))
+        board.apply_move((0, 0))
+        while board.get_legal_moves():
+            legal_moves = board.get_legal_moves()
+            deadline = timeit.default_timer() + 0.05
+            time_left = lambda: 1000 * (deadline - timeit.default_timer())
+            move = agentUT.get_move(board.copy(), legal_moves, time_left)
+            self.assertIn(move, legal_moves)
+            board.apply_move(move)
+            replies = board.get_legal_moves()
+            if not replies:
+                break
+            board.apply_move(replies[-1])
+        self.assertGreater(agentUT.tt.stats()["hits"], 0)
+
+    def test_pondering(self):
+        """ Test that the replies searched while pondering are reused """
+        agentUT = game_agent.CustomPlayer(1, improved_score, True, "alphabeta", tt_size=1 << 12,
+                                          ordering="killers", ponder=True)
+        board = random_position(agentUT, 0)
+        deadline = timeit.default_timer() + 0.05
+        move = agentUT.get_move(board.copy(), board.get_legal_moves(),
+                                lambda: 1000 * (deadline - timeit.default_timer()))
+        board.apply_move(move)
+        time.sleep(0.2)
+        agentUT.game_over(board)
+        self.assertIsNone(agentUT.ponderer.thread)
+
+        # The scores depend on the entries the searches left in the shared
+        # table, so only the depths and moves are checked
+        for reply in board.get_legal_moves():
+            child = board.forecast_move(reply)
+            depth, score, move = agentUT.ponderer.lookup(child)
+            self.assertGreaterEqual(depth, agentUT.search_depth)
+            self.assertIn(move, child.get_legal_moves())
+
+        # get_move() waits for the ponder search to stop before searching
+        agentUT.ponderer.start(board)
+        thread = agentUT.ponderer.thread
+        child = board.forecast_move(board.get_legal_moves()[0])
+        deadline = timeit.default_timer() + 0.05
+        agentUT.get_move(child, child.get_legal_moves(), lambda: 1000 * (deadline - timeit.default_timer()))
+        self.assertFalse(thread.is_alive())
+        agentUT.game_over(child)
+
+        # The ponder search is stopped at the end of every game, however it
+        # ends (a loaded machine can make the agent run out of time), against
+        # an opponent that does not search, which the ponder thread would
+        # slow down in this process
+        opponent = RandomPlayer()
+        for players in ((agentUT, opponent), (opponent, agentUT)):
+            isolation.BitBoard(*players).play(time_limit=200)
+            self.assertIsNone(agentUT.ponderer.thread)
+
+    def test_parallel_search(self):
+        """ Test that splitting the root between processes finds the same value """
+        for method in ("minimax", "alphabeta", "pvs"):
+            reference = game_agent.CustomPlayer(1, improved_score, False, "minimax")
+            agentUT = game_agent.CustomPlayer(1, improved_score, False, method, tt_size=1 << 12,
+                                              ordering="killers", workers=2)
+            for agent in (reference, agentUT):
+                agent.time_left = lambda: 1e4
+            try:
+                for seed in range(3):
+                    for depth in (1, 2, 3):
+                        expected, _ = reference.dosearch(random_position(reference, seed), depth)
+                        board = random_position(agentUT, seed)
+                        score, move = agentUT.splitter.search(agentUT, board, depth)
+                        self.assertEqual(expected, score)
+                        self.assertIn(move, board.get_legal_moves())
+
+                deadline = timeit.default_timer() + 0.1
+                agentUT.iterative = True
+                move = agentUT.get_move(board, board.get_legal_moves(),
+                                        lambda: 1000 * (deadline - timeit.default_timer()))
+                self.assertIn(move, board.get_legal_moves())
+                self.assertGreater(deadline, timeit.default_timer())
+            finally:
+                agentUT.close()
+
+    def test_worker_state(self):
+        """ Test that the workers are sent the parameters and the board, without the caches """
+        agentUT = game_agent.CustomPlayer(1, improved_score, False, "alphabeta", tt_size=1 << 12,
+                                          endgame=20, symmetry_plies=2)
+        agentUT.time_left = lambda: 1e4
+        board = random_position(agentUT, 0)
+        agentUT.get_move(board, board.get_legal_moves(), lambda: 1e4)
+        self.assertTrue(agentUT.symmetries)
+        copy = pickle.loads(pickle.dumps(agentUT))
+        self.assertIsNone(copy.tt)
+        self.assertEqual({}, copy.symmetries)
+        self.assertEqual({}, copy.solver.paths)
+        copy.time_left = agentUT.time_left
+        self.assertEqual(agentUT.dosearch(board, 3), copy.dosearch(replace_players(board, {agentUT: copy}), 3))
+
+        # The board of a task pickles neither player
+        board = replace_players(board, {agentUT: PLAYER, "null_agent": OPPONENT})
+        self.assertNotIn(b"CustomPlayer", pickle.dumps(board))
+        restored = replace_players(pickle.loads(pickle.dumps(board)), {PLAYER: agentUT})
+        self.assertIs(agentUT, restored.active_player)
+        self.assertEqual(board.hash(), restored.hash())
+        self.assertEqual(board.get_legal_moves(), restored.get_legal_moves())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""This file contains the parameter sweep behind `matcher.tryall`: the
+contestants are described by a declarative grid of `CustomPlayer` parameters,
+every contestant plays a fair set of matches against every opponent, and the
+matches of all the pairings are scheduled together on a pool of worker
+processes (see `tournament.play_matches`).
+
+Every pairing is identified by a hash of its configuration: the class and
+parameters of both players, the time limit and the seed of the sweep. The
+games are recorded in a `resultstore.ResultStore` under that hash, so a rerun
+only plays the matches it does not have yet: adding a heuristic to the grid
+plays the pairings of its contestants only, and raising the number of matches
+plays the extra matches only.
+
+Match k of every pairing starts from the same random opening, drawn from the
+seed of the sweep and k, so all the contestants are compared on the same
+positions.
+"""
+import itertools
+import random
+
+from collections import namedtuple
+
+from game_agent import CustomPlayer
+from isolation import BitBoard
+from tournament import (TIME_LIMIT, describe, match_pool, match_seed, pairing_key, play_matches,
+                        player_key)
+
+Contestant = namedtuple("Contestant", ["name", "cls", "params"])
+
+
+def expand_grid(grid, cls=CustomPlayer, name=None):
+    """
+    Return a contestant for every combination of the values of a grid of
+    parameters.
+
+    Parameters
+    ----------
+    grid : dict<str, list>
+        The values of every parameter of `cls`, e.g.
+        {"method": ["minimax", "alphabeta"], "search_depth": [3, 5]}.
+
+    cls : class (optional)
+        The class of the players.
+
+    name : callable (optional)
+        Returns the name of a contestant from its parameters; by default the
+        parameters joined as "key=value" (function values by their name).
+
+    Returns
+    -------
+    list<Contestant>
+        The contestants, in the order of the grid (the last parameter
+        varies fastest).
+    """
+    keys = list(grid)
+    contestants = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        params = dict(zip(keys, values))
+        if name is not None:
+            contestant_name = name(params)
+        else:
+            contestant_name = ", ".join("{}={}".format(key, value.__name__ if callable(value) else describe(value))
+                                        for key, value in params.items())
+        contestants.append(Contestant(contestant_name, cls, params))
+    return contestants
+
+
+def contestant_key(contestant):
+    """ Return the description of a contestant's class and parameters """
+    return player_key(contestant.cls, contestant.params)
+
+
+def pairing_hash(contestant, opponent, time_limit=TIME_LIMIT, seed=0):
+    """ Return the hash of the configuration of a pairing (see `tournament.pairing_config`) """
+    return pairing_key("time_limit={} seed={}".format(time_limit, seed),
+                       contestant_key(contestant), contestant_key(opponent))
+
+
+def random_opening(seed, plies=2):
+    """ Return the random opening moves drawn from a seed """
+    rng = random.Random(seed)
+    board = BitBoard("Player1", "Player2")
+    opening = []
+    for _ in range(plies):
+        move = rng.choice(board.get_legal_moves())
+        board.apply_move(move)
+        opening.append(move)
+    return opening
+
+
+def run_sweep(contestants, opponents, num_matches, store, processes=None, seed=0,
+              time_limit=TIME_LIMIT):
+    """
+    Play `num_matches` fair matches between every contestant and every
+    opponent, reusing the matches recorded in the store.
+
+    Parameters
+    ----------
+    contestants, opponents : list<Contestant>
+        The players of the pairings.
+
+    num_matches : int
+        The number of matches of every pairing.
+
+    store : `resultstore.ResultStore`
+        The store of the games; every pairing is recorded under its
+        pairing_hash(), match k as "#k".
+
+    processes : int (optional)
+        The number of worker processes (None: one per CPU); 1 plays the
+        matches in this process.
+
+    seed : int (optional)
+        The seed of the random openings.
+
+    time_limit : float (optional)
+        The number of milliseconds allowed for every move.
+
+    Returns
+    -------
+    dict<(str, str), list<list<dict>>>
+        The games of every match of every (contestant name, opponent name)
+        pairing, as recorded in the store (see resultstore.py).
+    """
+    results = {}
+    tasks = []
+    for contestant, opponent in itertools.product(contestants, opponents):
+        config = pairing_hash(contestant, opponent, time_limit, seed)
+        recorded = store.matches(config)
+        results[(contestant.name, opponent.name)] = matches = [None] * num_matches
+        for k in range(num_matches):
+            games = recorded.get("#{}".format(k))
+            if games is not None and len(games) == 2:
+                matches[k] = games
+            else:
+                tasks.append((config, k, contestant, opponent))
+
+    if tasks:
+        openings = {k: random_opening(match_seed(seed, k)) for _, k, _, _ in tasks}
+        pool = match_pool(processes)
+        try:
+            played = play_matches([(contestant.cls(**contestant.params), opponent.cls(**opponent.params))
+                                   for _, _, contestant, opponent in tasks],
+                                  processes, pool=pool, indexes=range(len(tasks)),
+                                  openings=[openings[k] for _, k, _, _ in tasks],
+                                  seeds=[match_seed(seed, k) for _, k, _, _ in tasks],
+                                  time_limit=time_limit)
+            for index, _, records in played:
+                config, k, contestant, opponent = tasks[index]
+                names = (contestant.name, opponent.name)
+                for record in records:
+                    for key in ("first", "second", "winner"):
+                        if record[key] is not None:
+                            record[key] = names[record[key] - 1]
+                store.add(config, "#{}".format(k), records)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            store.flush()
+        # The games played, as they read from the store
+        pairings = {config: (contestant.name, opponent.name) for config, _, contestant, opponent in tasks}
+        for config, names in pairings.items():
+            recorded = store.matches(config)
+            results[names] = [recorded["#{}".format(k)] for k in range(num_matches)]
+    return results
@@ -0,0 +1,66 @@
+"""
+This file contains test cases for the parameter sweep of sweep.py: the
+contestants of a grid of parameters, the hashes of their pairings, and the
+matches reused from the result store.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from resultstore import ResultStore
+from sample_players import RandomPlayer
+from scorefunctions import improved_score
+from sweep import Contestant, expand_grid, pairing_hash, run_sweep
+
+
+class SweepTest(unittest.TestCase):
+
+    def test_sweep(self):
+        """ Test the parameter grid and the pairings cached by the sweep """
+        grid = {"score_fn": [improved_score], "method": ["minimax", "alphabeta"],
+                "search_depth": [1, 2], "iterative": [False]}
+        contestants = expand_grid(grid)
+        self.assertEqual(4, len(contestants))
+        self.assertEqual({"score_fn": improved_score, "method": "alphabeta", "search_depth": 1,
+                          "iterative": False}, contestants[2].params)
+        opponent = Contestant("random", RandomPlayer, {})
+        hashes = {pairing_hash(contestant, opponent) for contestant in contestants}
+        self.assertEqual(4, len(hashes))
+        self.assertIn(pairing_hash(expand_grid(grid)[0], opponent), hashes)
+        self.assertNotIn(pairing_hash(contestants[0], opponent, seed=1), hashes)
+
+        class CountingPlayer(RandomPlayer):
+            games = 0
+
+            def __init__(self):
+                CountingPlayer.games += 1
+
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "sweep.sqlite")
+            counting = [Contestant("counting", CountingPlayer, {})]
+            with ResultStore(path) as store:
+                results = run_sweep(contestants[:2], counting, 2, store, processes=1)
+            self.assertEqual(4, CountingPlayer.games)
+            for matches in results.values():
+                self.assertEqual(2, len(matches))
+                for games in matches:
+                    self.assertEqual(2, len(games))
+            # Only the new contestant and the new match are played
+            CountingPlayer.games = 0
+            with ResultStore(path) as store:
+                self.assertEqual(results, run_sweep(contestants[:2], counting, 2, store, processes=1))
+                self.assertEqual(0, CountingPlayer.games)
+                results = run_sweep(contestants[:3], counting, 3, store, processes=1)
+            self.assertEqual(2 + 3, CountingPlayer.games)
+            self.assertEqual(3, len(results))
+            # Every pairing plays match k from the same opening
+            openings = [[games[0]["opening"] for games in matches] for matches in results.values()]
+            self.assertEqual(openings[0], openings[2])
+        finally:
+            shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,267 @@
+"""This file contains the tablebase of small boards: an exhaustive solver that
+finds the game-theoretic result of the positions of a small board (e.g. 4x4,
+5x5 or 5x6), the generator that writes them to a binary file, and the reader
+that `CustomPlayer` uses to look positions up.
+
+A position is identified by an exact 64-bit key: the occupied cells in the low
+`width * height` bits, then the cell index (+1, 0 before the first move) of the
+player to move and of its opponent, 6 bits each. The result does not depend on
+which player is which, so the same entry serves both players.
+
+The file is an open-addressing hash table of fixed-size slots behind a small
+header, read through `mmap`, so a lookup costs one hash and (usually) one slot
+read, whatever the size of the file:
+
+    header : magic (6s), width (B), height (B), number of slots (Q)
+    slot   : key (Q), result (B: 0 empty, 1 loss, 2 win for the player to
+             move), best move (B: cell index + 1, 0 for none)
+
+Generation splits the game after the first move into one task per cell and
+solves the tasks on a process pool. Every task writes its positions to a
+segment file in a work directory (written under a temporary name and renamed
+when complete), so an interrupted generation resumes with the missing
+segments only. The segments are then merged into the tablebase file.
+"""
+import mmap
+import os
+import struct
+
+from multiprocessing import Pool
+
+from isolation.bitboard import knight_tables
+from isolation.symmetry import board_position, position_key
+
+MAGIC = b"ISOTB1"
+HEADER = struct.Struct("<6sBBQ")
+SLOT = struct.Struct("<QBB")
+SEGMENT = struct.Struct("<QBB")
+
+LOSS = 1
+WIN = 2
+
+MAX_CELLS = 52      # Keys hold the occupied cells and two 6-bit locations in 64 bits
+
+
+def board_key(game):
+    """ Return the key of the position of an `isolation.Board` """
+    return position_key(*board_position(game), cells=game.width * game.height)
+
+
+def _slot(key, num_slots):
+    """ Return the first slot probed for a key (num_slots is a power of 2) """
+    key = (key ^ (key >> 31)) * 0x7fb5d329728ea185 & 0xffffffffffffffff
+    return (key ^ (key >> 27)) & (num_slots - 1)
+
+
+class TablebaseSolver:
+    """Memoized exhaustive solver of the positions of a small board.
+
+    Every position is solved for the player to move: it wins if one of its
+    moves leads to a position lost for the opponent. The search stops at the
+    first winning move, so the positions behind the other moves are not
+    necessarily solved.
+
+    Parameters
+    ----------
+    width, height : int
+        The dimensions of the board.
+    """
+
+    def __init__(self, width, height):
+        if width * height > MAX_CELLS:
+            raise ValueError("Boards of more than {} cells are not supported".format(MAX_CELLS))
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.masks = knight_tables(width, height).masks
+        self.results = {}
+
+    def solve(self, occupied, active, inactive):
+        """Solve a position, given as the bitmask of the occupied cells and
+        the cell index of the player to move and of its opponent (-1 before
+        their first move).
+
+        Returns
+        -------
+        (bool, int)
+            Whether the player to move wins, and its best move (a cell index;
+            -1 if it has no legal move).
+        """
+        cells = self.cells
+        key = occupied | (active + 1) << cells | (inactive + 1) << (cells + 6)    # position_key(), inlined
+        result = self.results.get(key)
+        if result is not None:
+            return result
+        if active < 0:
+            moves = ((1 << cells) - 1) & ~occupied
+        else:
+            moves = self.masks[active] & ~occupied
+        result = (False, -1)
+        while moves:
+            bit = moves & -moves
+            moves ^= bit
+            move = bit.bit_length() - 1
+            if not self.solve(occupied | bit, inactive, move)[0]:
+                result = (True, move)
+                break
+            if result[1] < 0:
+                result = (False, move)
+        self.results[key] = result
+        return result
+
+
+def _solve_task(args):
+    """Solve the positions after the first move `first` and write them to a
+    segment file, unless it already exists. Returns the segment path.
+    """
+    width, height, first, workdir = args
+    path = os.path.join(workdir, "segment-{}x{}-{:02d}.bin".format(width, height, first))
+    if not os.path.exists(path):
+        solver = TablebaseSolver(width, height)
+        solver.solve(1 << first, -1, first)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as segment:
+            for key, (win, move) in solver.results.items():
+                segment.write(SEGMENT.pack(key, WIN if win else LOSS, move + 1))
+        os.replace(tmp_path, path)
+    return path
+
+
+def generate(width, height, path, workdir=None, processes=None):
+    """Solve every position of a board reached by the exhaustive search and
+    write the tablebase file.
+
+    Parameters
+    ----------
+    width, height : int
+        The dimensions of the board.
+
+    path : str
+        The path of the tablebase file.
+
+    workdir : str (optional)
+        The directory of the segment files; generation resumes from the
+        segments found there. Defaults to `path` + ".segments".
+
+    processes : int (optional)
+        The number of worker processes; defaults to the number of CPUs.
+
+    Returns
+    -------
+    int
+        The number of positions in the tablebase.
+    """
+    cells = width * height
+    if cells > MAX_CELLS:
+        raise ValueError("Boards of more than {} cells are not supported".format(MAX_CELLS))
+    workdir = workdir or path + ".segments"
+    os.makedirs(workdir, exist_ok=True)
+    tasks = [(width, height, first, workdir) for first in range(cells)]
+    with Pool(processes) as pool:
+        segments = list(pool.imap_unordered(_solve_task, tasks))
+
+    results = {}
+    for segment in sorted(segments):
+        with open(segment, "rb") as f:
+            for key, result, move in SEGMENT.iter_unpack(f.read()):
+                results[key] = (result, move)
+    # The empty board: the first player wins if one of its first moves loses
+    # for the second player
+    root = (LOSS, 1)
+    for first in range(cells):
+        result, _ = results[position_key(1 << first, -1, first, cells)]
+        if result == LOSS:
+            root = (WIN, first + 1)
+            break
+    results[position_key(0, -1, -1, cells)] = root
+
+    num_slots = 1
+    while num_slots < 2 * len(results):
+        num_slots *= 2
+    table = bytearray(HEADER.size + num_slots * SLOT.size)
+    HEADER.pack_into(table, 0, MAGIC, width, height, num_slots)
+    for key, (result, move) in results.items():
+        index = _slot(key, num_slots)
+        while table[HEADER.size + index * SLOT.size + 8]:
+            index = (index + 1) & (num_slots - 1)
+        SLOT.pack_into(table, HEADER.size + index * SLOT.size, key, result, move)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(table)
+    os.replace(tmp_path, path)
+    return len(results)
+
+
+class Tablebase:
+    """Read-only access to a tablebase file, through a memory map.
+
+    Parameters
+    ----------
+    path : str
+        The path of the tablebase file written by generate().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.open()
+
+    def open(self):
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.num_slots = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not a tablebase file".format(self.path))
+
+    def close(self):
+        self.map.close()
+
+    def __getstate__(self):
+        # The memory map is opened again on the other side
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.open()
+
+    def probe(self, key):
+        """Look up a position by key.
+
+        Returns
+        -------
+        (bool, int) or None
+            Whether the player to move wins and its best move (a cell index;
+            -1 if it has no legal move), or None if the position is not in
+            the tablebase.
+        """
+        index = _slot(key, self.num_slots)
+        while True:
+            slot_key, result, move = SLOT.unpack_from(self.map, HEADER.size + index * SLOT.size)
+            if not result:
+                return None
+            if slot_key == key:
+                return result == WIN, move - 1
+            index = (index + 1) & (self.num_slots - 1)
+
+    def lookup(self, game):
+        """Look up the position of an `isolation.Board`.
+
+        Returns
+        -------
+        (bool, tuple(int, int)) or None
+            Whether the player to move wins and its best move ((-1, -1) if it
+            has no legal move), or None if the board has another size or the
+            position is not in the tablebase.
+        """
+        if game.width != self.width or game.height != self.height:
+            return None
+        entry = self.probe(board_key(game))
+        if entry is None:
+            return None
+        win, move = entry
+        return win, divmod(move, self.width) if move >= 0 else (-1, -1)
+
+
+if __name__ == "__main__":
+    for size in ((4, 4), (5, 5)):
+        name = "tablebase-{}x{}.bin".format(*size)
+        print("{}: {} positions".format(name, generate(size[0], size[1], name)))
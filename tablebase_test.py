@@ -0,0 +1,91 @@
+"""
+This file contains test cases for the tablebase of tablebase.py: the results
+and moves it stores must match a search of the whole game tree, and an
+interrupted generation must resume to the same file.
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import isolation
+import game_agent
+
+from pondering import Ponderer
+from tablebase import generate
+
+
+class TablebaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_tablebase(self):
+        """ Test a 4x4 tablebase against a full-depth search, and its regeneration """
+        path = os.path.join(self.workdir, "tablebase-4x4.bin")
+        count = generate(4, 4, path, processes=2)
+        with open(path, "rb") as f:
+            content = f.read()
+
+        utility = lambda game, player: game.utility(player)
+        agentUT = game_agent.CustomPlayer(1, utility, False, "alphabeta", tablebase=path)
+        tablebase = agentUT.tablebase
+        agentUT.tablebase = None
+        agentUT.time_left = lambda: 1e3
+        rng = random.Random(0)
+        found = 0
+        for _ in range(400):
+            board = isolation.BitBoard(agentUT, "null_agent", 4, 4)
+            for _ in range(rng.randint(0, 8)):
+                if board.get_legal_moves():
+                    board.apply_move(rng.choice(board.get_legal_moves()))
+            if board.active_player != agentUT:
+                continue
+            entry = tablebase.lookup(board)
+            if entry is None:
+                continue
+            found += 1
+            win, move = entry
+            depth = board.get_blank_spaces_count()
+            expected = agentUT.dosearch(board, depth)[0]
+            self.assertEqual(float("inf") if win else float("-inf"), expected)
+            if win:
+                with board.played(move):
+                    self.assertEqual(expected, agentUT.alphabeta(board, depth - 1, maximizing_player=False)[0])
+        self.assertGreater(found, 20)
+
+        # The search returns the result of the tablebase
+        agentUT.tablebase = tablebase
+        board = isolation.BitBoard(agentUT, "null_agent", 4, 4)
+        self.assertIsNotNone(agentUT.get_move(board, board.get_legal_moves(), lambda: 1e3))
+        self.assertEqual(1, agentUT.nodes)
+
+        # The ponder search looks the positions up for the player it ponders for
+        searcher = Ponderer(agentUT).make_searcher()
+        checked = 0
+        for _ in range(400):
+            board = isolation.BitBoard(agentUT, "null_agent", 4, 4)
+            for _ in range(rng.randint(1, 8)):
+                if board.get_legal_moves():
+                    board.apply_move(rng.choice(board.get_legal_moves()))
+            if tablebase.lookup(board) is not None:
+                self.assertEqual(agentUT.alphabeta(board, 1), searcher.alphabeta(board, 1))
+                checked += 1
+        self.assertGreater(checked, 20)
+        tablebase.close()
+
+        # Generation resumes from the segments left
+        segments = os.path.join(self.workdir, "tablebase-4x4.bin.segments")
+        os.remove(os.path.join(segments, sorted(os.listdir(segments))[3]))
+        os.remove(path)
+        self.assertEqual(count, generate(4, 4, path, processes=2))
+        with open(path, "rb") as f:
+            self.assertEqual(content, f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
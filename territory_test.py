@@ -0,0 +1,72 @@
+"""
+This file contains test cases for the bitmask region searches and knight
+distances of territory.py, against cell-by-cell definitions.
+"""
+import unittest
+
+from isolation.bitboard import knight_tables, popcount
+from scorefunctions import bottleneck_score, territory_score, voronoi_score
+from search_test import random_position
+from territory import articulation_points, knight_distance, knight_shifts, reachable, spread, voronoi
+
+
+class TerritoryTest(unittest.TestCase):
+
+    def test_regions(self):
+        """ Test the bitmask searches against cell-by-cell definitions """
+        for seed in range(30):
+            board = random_position("Player1", seed, plies=2 * (seed % 6) + 2)
+            tables, shifts = knight_tables(7, 7), knight_shifts(7, 7)
+            blank = board.get_blank_mask()
+            cells = [i for i in range(49) if blank >> i & 1]
+            union = 0
+            for i in cells:
+                union |= tables.masks[i]
+            self.assertEqual(union, spread(shifts, blank))
+            locations = [board.get_player_location(p) for p in (board.active_player, board.inactive_player)]
+            starts = [tables.masks[r * 7 + c] & blank for r, c in locations]
+            regions = [reachable(shifts, start, blank) for start in starts]
+            own, opp = voronoi(shifts, starts[0], starts[1], blank)
+            self.assertFalse(own & opp)
+            self.assertEqual(own, own & regions[0])
+            self.assertEqual(opp, opp & regions[1])
+            # A cell is a bottleneck if blocking it cuts off another cell
+            cell = locations[0][0] * 7 + locations[0][1]
+            expected = 0
+            for i in cells:
+                bit = 1 << i
+                if regions[0] & bit:
+                    rest = regions[0] & ~bit
+                    if popcount(reachable(shifts, tables.masks[cell] & rest, rest)) < popcount(regions[0]) - 1:
+                        expected |= bit
+            self.assertEqual(expected, articulation_points(tables.masks, cell, regions[0]))
+            for score_fn in (territory_score, voronoi_score, bottleneck_score):
+                self.assertEqual(score_fn(board, board.active_player),
+                                 -score_fn(board, board.inactive_player))
+
+    def test_distances(self):
+        """ Test the knight distances against a breadth-first search """
+        def bfs(width, height, source, blank):
+            distances, frontier = {source: 0}, [source]
+            while frontier:
+                next_frontier = []
+                for r, c in frontier:
+                    for dr, dc in ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)):
+                        cell = (r + dr, c + dc)
+                        if 0 <= cell[0] < height and 0 <= cell[1] < width and cell not in distances:
+                            distances[cell] = distances[(r, c)] + 1
+                            if cell in blank:
+                                next_frontier.append(cell)
+                frontier = next_frontier
+            return distances
+
+        for width, height in ((3, 3), (4, 5), (7, 7)):
+            cells = [(r, c) for r in range(height) for c in range(width)]
+            for a in cells:
+                expected = bfs(width, height, a, set(cells))
+                for b in cells:
+                    self.assertEqual(expected.get(b, width * height), knight_distance(width, height, a, b))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""This file contains the time manager used by `CustomPlayer.get_move` to decide
+whether iterative deepening should start another iteration.
+
+Instead of starting a new depth whenever some fixed amount of time is left
+(and throwing most of it away on a Timeout), the time manager measures the
+effective branching factor and the node rate of the iterations that completed,
+predicts the cost of the next one, and stops when it cannot finish in time.
+"""
+
+
+class TimeManager:
+    """Predict the duration of the next iteration of iterative deepening.
+
+    Parameters
+    ----------
+    safety : float (optional)
+        Factor applied to the predicted duration of the next iteration before
+        comparing it with the time available.
+
+    window : int (optional)
+        The number of most recent iterations used to estimate the effective
+        branching factor. Two iterations smooth out the odd/even depth effect
+        of alphabeta search.
+    """
+
+    def __init__(self, safety=1.0, window=2):
+        self.safety = safety
+        self.window = window
+        self.nodes_per_ms = None
+        self.iterations = []
+
+    def start(self):
+        """ Forget the iterations of the previous move """
+        self.iterations = []
+
+    def record(self, depth, nodes, elapsed):
+        """Record a completed iteration.
+
+        Parameters
+        ----------
+        depth : int
+            The depth of the iteration.
+
+        nodes : int
+            The number of nodes searched by the iteration.
+
+        elapsed : float
+            The duration of the iteration, in milliseconds.
+        """
+        self.iterations.append((depth, max(1, nodes), elapsed))
+        total_nodes = sum(x[1] for x in self.iterations)
+        total_elapsed = sum(x[2] for x in self.iterations)
+        if total_elapsed >= 1.:
+            # Measurements of the current move are kept only once they cover
+            # enough time to be meaningful
+            self.nodes_per_ms = total_nodes / total_elapsed
+
+    def branching_factor(self):
+        """Return the effective branching factor (geometric mean of the growth
+        in nodes between the last iterations), or None if fewer than two
+        iterations completed.
+        """
+        nodes = [x[1] for x in self.iterations[-(self.window + 1):]]
+        if len(nodes) < 2:
+            return None
+        return (nodes[-1] / nodes[0]) ** (1. / (len(nodes) - 1))
+
+    def predict(self):
+        """Return the predicted duration (in milliseconds) of the next
+        iteration, or None if there is not enough data to predict it.
+        """
+        ebf = self.branching_factor()
+        if ebf is None or not self.nodes_per_ms:
+            return None
+        return self.iterations[-1][1] * ebf / self.nodes_per_ms
+
+    def can_finish_next(self, time_available):
+        """Test whether the next iteration is expected to finish within the
+        time available (in milliseconds). Returns True when the duration
+        cannot be predicted yet.
+        """
+        predicted = self.predict()
+        return predicted is None or predicted * self.safety <= time_available
+
+    def stats(self):
+        """ Return the estimates of the time manager, for logging """
+        return {"iterations": len(self.iterations),
+                "branching_factor": self.branching_factor(),
+                "nodes_per_ms": self.nodes_per_ms,
+                "predicted_ms": self.predict()}
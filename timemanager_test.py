@@ -0,0 +1,34 @@
+"""
+This file contains test cases for the iteration time predictions of
+timemanager.py.
+"""
+import unittest
+
+from timemanager import TimeManager
+
+
+class TimeManagerTest(unittest.TestCase):
+
+    def test_prediction(self):
+        """ Test the prediction of the duration of the next iteration """
+        manager = TimeManager(window=2)
+        manager.start()
+        manager.record(1, 10, 1.)
+        self.assertIsNone(manager.predict())
+        self.assertTrue(manager.can_finish_next(0.))
+        manager.record(2, 40, 4.)
+        manager.record(3, 160, 16.)
+        self.assertAlmostEqual(4., manager.branching_factor())
+        self.assertAlmostEqual(64., manager.predict())
+        self.assertTrue(manager.can_finish_next(70.))
+        self.assertFalse(manager.can_finish_next(50.))
+
+        # The node rate is carried over to the next move
+        manager.start()
+        manager.record(1, 100, 0.)
+        manager.record(2, 400, 0.)
+        self.assertAlmostEqual(160., manager.predict())
+
+
+if __name__ == '__main__':
+    unittest.main()
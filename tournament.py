@@ -17,16 +17,39 @@ For example, if the random moves chosen for initialization are (5, 2) and
 agentB at (1, 3) as player 2 then play to conclusion; the agents swap
 initiative in the second match with agentB at (5, 2) as player 1 and agentA at
 (1, 3) as player 2.
+
+The matches are played on a pool of worker processes (one per CPU by default),
+each pinned to its own CPU where the platform allows it so that the players
+get the same computing power whatever the load, and their results are
+collected as they complete. Every match has its own seed for the random
+opening moves, derived from the seed of the tournament and the index of the
+match, so a tournament replays the same openings whatever the number of
+workers.
+
+Instead of a fixed number of matches, every pairing can be played until a
+sequential probability ratio test (see ratings.py) tells whether the student
+agent is stronger than its opponent by a given Elo margin, which settles the
+lopsided pairings in a few games.
+
+The random openings can also be replaced by a fixed opening suite (see
+openings.py), played by every pairing with the colours swapped, so that the
+results do not depend on the luck of the openings and compare across runs.
 """
 
 
-import itertools
+import hashlib
+import inspect
+import os
 import random
 import warnings
 
-from collections import namedtuple
+from collections import Counter, namedtuple
+from multiprocessing import Pool, Value
 
-from isolation import Board
+from isolation import BitBoard
+from openings import load_suite
+from ratings import SPRT, bradley_terry, elo
+from resultstore import ResultStore
 from sample_players import RandomPlayer
 from scorefunctions import null_score, accessibility_score, net_mobility_score,\
     net_advantage_score, proximity_score, offensive_score,\
@@ -41,6 +64,13 @@ from game_agent import CustomPlayer
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
+PROCESSES = None  # number of worker processes (None: one per CPU)
+SEED = 0  # seed of the random opening moves of the tournament
+SPRT_ARGS = {"elo0": 0., "elo1": 150.}  # hypotheses of the early-stopping test (None: fixed matches)
+MAX_MATCHES = 50  # maximum number of matches per player order against each opponent with the test
+BATCH = 8  # number of matches of a pairing played between two checks of the test
+RESULTS = None  # file recording every game (see resultstore.py), e.g. "tournament.sqlite"
+SUITE = None  # opening suite file (see openings.py) played by every pairing, None for random openings
 
 TIMEOUT_WARNING = "One or more agents lost a match this round due to " + \
                   "timeout. The get_move() function must return before " + \
@@ -63,27 +93,43 @@ same opponents.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_match(player1, player2):
+def play_match(player1, player2, seed=None, records=None, opening=None, time_limit=TIME_LIMIT):
     """
     Play a "fair" set of matches between two agents by playing two games
     between the players, forcing each agent to play from randomly selected
     positions. This should control for differences in outcome resulting from
     advantage due to starting position on the board.
+
+    The random positions are drawn with `random.Random(seed)` if a seed is
+    given, or from the global random generator otherwise, unless an
+    `opening` (e.g. from an opening suite, see openings.py) gives the moves.
+    If `records` is a list, a dict is appended to it for every game (see
+    resultstore.py), with the players given as 1 (player1) or 2 (player2).
+    Every move must be played within `time_limit` milliseconds.
     """
+    rng = random.Random(seed) if seed is not None else random
     num_wins = {player1: 0, player2: 0}
     num_timeouts = {player1: 0, player2: 0}
     num_invalid_moves = {player1: 0, player2: 0}
-    games = [Board(player1, player2), Board(player2, player1)]
+    games = [BitBoard(player1, player2), BitBoard(player2, player1)]
 
     # initialize both games with a random move and response
-    for _ in range(2):
-        move = random.choice(games[0].get_legal_moves())
+    moves = opening
+    opening = []
+    for ply in range(2 if moves is None else len(moves)):
+        move = rng.choice(games[0].get_legal_moves()) if moves is None else moves[ply]
         games[0].apply_move(move)
         games[1].apply_move(move)
+        opening.append(move)
 
     # play both games and tally the results
-    for game in games:
-        winner, _, termination = game.play(time_limit=TIME_LIMIT)
+    for game, order in zip(games, ([1, 2], [2, 1])):
+        winner, moves, termination = game.play(time_limit=time_limit)
+        if records is not None:
+            records.append({"first": order[0], "second": order[1], "seed": seed,
+                            "opening": opening, "moves": moves,
+                            "winner": {player1: 1, player2: 2}.get(winner),
+                            "termination": termination, "move_times": game.move_times})
 
         if player1 == winner:
             num_wins[player1] += 1
@@ -108,35 +154,283 @@ def play_match(player1, player2):
     return num_wins[player1], num_wins[player2]
 
 
-def play_round(agents, num_matches):
+def _init_worker(next_cpu):
+    """Pin the worker process to the next CPU available to the pool
+    (`next_cpu` is the counter of the CPUs given to the workers so far).
+    """
+    if hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        with next_cpu.get_lock():
+            cpu = cpus[next_cpu.value % len(cpus)]
+            next_cpu.value += 1
+        os.sched_setaffinity(0, {cpu})
+
+
+def _play_match_task(task):
+    """Play the match of a task: (index, player1, player2, seed, opening,
+    time_limit). Returns the index, the wins of each player and the records
+    of the games.
+    """
+    index, player1, player2, seed, opening, time_limit = task
+    if seed is None:
+        records = []
+        return index, play_match(player1, player2, seed, records, opening, time_limit), records
+    # Players that draw random moves (e.g. RandomPlayer) replay them too. The
+    # global generator is restored after the match, since the matches played
+    # in this process share it with the caller
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        records = []
+        return index, play_match(player1, player2, seed, records, opening, time_limit), records
+    finally:
+        random.setstate(state)
+
+
+def match_seed(seed, index):
+    """ Return the seed of the match `index` of a tournament, or None """
+    return None if seed is None else "{}:{}".format(seed, index)
+
+
+def match_pool(processes=None):
+    """
+    Return a pool of pinned worker processes for play_matches() (None: one
+    per CPU), or None to play in this process if `processes` is 1.
+    """
+    if processes == 1:
+        return None
+    return Pool(processes, initializer=_init_worker, initargs=(Value('i', 0),))
+
+
+def play_matches(pairs, processes=None, seed=None, pool=None, indexes=None, openings=None,
+                 seeds=None, time_limit=TIME_LIMIT):
+    """
+    Play a fair match between the players of every (player1, player2) pair,
+    on a pool of worker processes, and yield the results as they complete.
+
+    Parameters
+    ----------
+    pairs : list<(object, object)>
+        The players of every match. The players are sent to the workers, so
+        every match starts from a fresh copy of them.
+
+    processes : int (optional)
+        The number of worker processes (None: one per CPU); 1 plays the
+        matches one after the other in this process.
+
+    seed : int or str (optional)
+        The seed of the tournament: match `index` draws its opening moves
+        from `match_seed(seed, index)`. None uses the global random
+        generator.
+
+    pool : `multiprocessing.Pool` (optional)
+        The pool from match_pool() to play on, instead of a pool started
+        (and stopped) for these matches.
+
+    indexes : list (optional)
+        The index of every match (0, 1, ... by default), e.g. to play the
+        matches of a tournament in several calls.
+
+    openings : list (optional)
+        The opening moves of every match (see play_match); None draws them
+        at random.
+
+    seeds : list (optional)
+        The seed of every match, instead of the seeds derived from `seed`
+        and the indexes (e.g. to replay the same openings in several
+        pairings).
+
+    time_limit : float (optional)
+        The number of milliseconds allowed for every move.
+
+    Returns
+    -------
+    generator<(object, (int, int), list<dict>)>
+        The index of every match, the number of games won by each player
+        and the records of the games (see play_match), in the order the
+        matches complete.
+    """
+    indexes = range(len(pairs)) if indexes is None else indexes
+    openings = [None] * len(pairs) if openings is None else openings
+    seeds = [match_seed(seed, index) for index in indexes] if seeds is None else seeds
+    tasks = [(index, player1, player2, task_seed, opening, time_limit)
+             for index, (player1, player2), task_seed, opening in zip(indexes, pairs, seeds, openings)]
+    if pool is not None:
+        yield from pool.imap_unordered(_play_match_task, tasks)
+    elif processes == 1:
+        for task in tasks:
+            yield _play_match_task(task)
+    else:
+        with match_pool(processes) as pool:
+            yield from pool.imap_unordered(_play_match_task, tasks)
+
+
+def describe(value):
+    """
+    Return a stable description of a parameter value of a player: functions
+    by their name and a digest of their source (so that editing a score
+    function changes the description), classes by their name, and
+    containers item by item.
+    """
+    if inspect.isfunction(value):
+        name = "{}.{}".format(value.__module__, value.__qualname__)
+        try:
+            source = inspect.getsource(value)
+        except (OSError, TypeError):
+            return name
+        return "{}#{}".format(name, hashlib.sha1(source.encode()).hexdigest()[:8])
+    if callable(value):
+        return "{}.{}".format(getattr(value, "__module__", ""), getattr(value, "__qualname__", repr(value)))
+    if isinstance(value, dict):
+        return "{" + ", ".join("{}: {}".format(describe(k), describe(value[k])) for k in sorted(value)) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(describe(item) for item in value) + "]"
+    return repr(value)
+
+
+def player_key(cls, params):
+    """ Return the description of the class and parameters of a player """
+    return "{}({})".format(describe(cls), ", ".join("{}={}".format(key, describe(params[key]))
+                                                     for key in sorted(params)))
+
+
+def pairing_config(config, player1, player2):
+    """
+    Return the configuration under which the matches between two players
+    are recorded: a hash of the settings of the round (`config`) and of the
+    class and parameters of both players (`CustomPlayer.params`, or the
+    attributes of the players without it).
+    """
+    keys = [player_key(type(player), getattr(player, "params", None) or vars(player))
+            for player in (player1, player2)]
+    return pairing_key(config, *keys)
+
+
+def pairing_key(config, key1, key2):
+    """
+    Return the hash of the settings `config` and of the player_key() of both
+    players, which pairing_config() records the matches under.
+    """
+    return hashlib.sha1("{} {} vs {}".format(config, key1, key2).encode()).hexdigest()[:16]
+
+
+def play_round(agents, num_matches, processes=PROCESSES, seed=SEED, sprt=None, batch=BATCH,
+               store=None, config=None, suite=None):
     """
     Play one round (i.e., a single match between each pair of opponents)
+
+    With `sprt` (the arguments of a `ratings.SPRT`, e.g. {"elo0": 0,
+    "elo1": 100}), the matches of every pairing are played `batch` at a
+    time, and a pairing stops as soon as the test accepts either hypothesis
+    (or after `num_matches` matches with each player order). The Elo
+    difference of every pairing and the Bradley-Terry rating of every agent
+    are reported with their 95% error bars.
+
+    With a `resultstore.ResultStore`, the games of every pairing are
+    recorded under the pairing_config() of `config` (the settings of the
+    round: by default, its seed and time limit) and of the two players, so
+    the matches already recorded are only reused by the same settings and
+    players: changing the parameters or the score function of a player
+    plays its matches again. Match k between two agents is named
+    "<name 1> vs <name 2> #k", whatever the other agents.
+
+    With an opening `suite` (from `openings.load_suite()`), every pairing
+    plays match k from opening k of the suite instead of `num_matches`
+    random openings per player order: the two games of a match swap the
+    colours, so every agent plays both sides of the same positions. The
+    default configuration then names the suite.
     """
     agent_1 = agents[-1]
+    opponents = agents[:-1]
     wins = 0.
     total = 0.
+    if config is None:
+        config = "seed={} time_limit={}".format(seed, TIME_LIMIT)
+        if suite is not None:
+            digest = hashlib.sha1(repr(list(suite)).encode()).hexdigest()[:12]
+            config += " suite={}".format(digest)
+    max_matches = len(suite) if suite is not None else 2 * num_matches
+    configs = [pairing_config(config, agent_1.player, agent_2.player) for agent_2 in opponents]
+    recorded = [store.matches(pairing) if store is not None else {} for pairing in configs]
 
     print("\nPlaying Matches:")
     print("----------")
 
-    for idx, agent_2 in enumerate(agents[:-1]):
-
-        counts = {agent_1.player: 0., agent_2.player: 0.}
-        names = [agent_1.name, agent_2.name]
-        print("  Match {}: {!s:^11} vs {!s:^11}".format(idx + 1, *names), end=' ')
-
-        # Each player takes a turn going first
-        for p1, p2 in itertools.permutations((agent_1.player, agent_2.player)):
-            for _ in range(num_matches):
-                score_1, score_2 = play_match(p1, p2)
-                counts[p1] += score_1
-                counts[p2] += score_2
-                total += score_1 + score_2
-
-        wins += counts[agent_1.player]
-
-        print("\tResult: {} to {}".format(int(counts[agent_1.player]),
-                                          int(counts[agent_2.player])))
+    counts = [[0, 0] for _ in opponents]
+    played = [0] * len(opponents)
+    tests = [SPRT(**sprt) if sprt is not None else None for _ in opponents]
+    size = batch if sprt is not None else max_matches
+
+    def finished(idx):
+        return played[idx] >= max_matches or (tests[idx] is not None and tests[idx].status())
+
+    def add_result(idx, score_1, score_2):
+        counts[idx][0] += score_1
+        counts[idx][1] += score_2
+        if tests[idx] is not None:
+            tests[idx].update(score_1, score_2)
+        pending[idx] -= 1
+        if pending[idx] == 0 and finished(idx):
+            names = [agent_1.name, opponents[idx].name]
+            print("  Match {}: {!s:^11} vs {!s:^11}".format(idx + 1, *names), end=' ')
+            print("\tResult: {} to {}".format(*counts[idx]), end=' ')
+            print("\tElo {:+.0f} +/- {:.0f}".format(*elo(*counts[idx])), end=' ')
+            print("\tSPRT: {}".format(tests[idx].status()) if tests[idx] is not None else "")
+
+    pool = match_pool(processes)
+    try:
+        while True:
+            # The next batch of matches of every pairing still going on
+            tasks = {}
+            for idx in range(len(opponents)):
+                if not finished(idx):
+                    # Each player takes a turn going first
+                    for k in range(played[idx], min(played[idx] + size, max_matches)):
+                        match = "{} vs {} #{}".format(agent_1.name, opponents[idx].name, k)
+                        tasks[match] = (idx, k % 2 == 0, suite[k] if suite is not None else None)
+                    played[idx] = min(played[idx] + size, max_matches)
+            if not tasks:
+                break
+            pending = Counter(idx for idx, _, _ in tasks.values())
+            for match in [match for match, (idx, _, _) in tasks.items() if len(recorded[idx].get(match, ())) == 2]:
+                idx, _, _ = tasks.pop(match)
+                winners = [game["winner"] for game in recorded[idx][match]]
+                add_result(idx, winners.count(agent_1.name), winners.count(opponents[idx].name))
+            pairs = [(agent_1, opponents[idx]) if first else (opponents[idx], agent_1)
+                     for idx, first, _ in tasks.values()]
+            results = play_matches([(p1.player, p2.player) for p1, p2 in pairs],
+                                   processes, seed, pool, list(tasks),
+                                   [opening for _, _, opening in tasks.values()])
+            names = dict(zip(tasks, pairs))
+            for match, (score_1, score_2), records in results:
+                idx, first, _ = tasks[match]
+                if store is not None:
+                    for record in records:
+                        for key in ("first", "second", "winner"):
+                            if record[key] is not None:
+                                record[key] = names[match][record[key] - 1].name
+                    store.add(configs[idx], match, records)
+                if not first:
+                    score_1, score_2 = score_2, score_1
+                add_result(idx, score_1, score_2)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if store is not None:
+            store.flush()
+
+    for idx in range(len(opponents)):
+        wins += counts[idx][0]
+        total += sum(counts[idx])
+
+    results = {}
+    for idx, agent_2 in enumerate(opponents):
+        results[(agent_1.name, agent_2.name)] = counts[idx][0]
+        results[(agent_2.name, agent_1.name)] = counts[idx][1]
+    print("\nRatings ({} games):".format(int(total)))
+    for name, (rating, error) in sorted(bradley_terry(results).items(), key=lambda item: -item[1][0]):
+        print("  {!s:<25}{:>+8.0f} +/- {:.0f}".format(name, rating, error))
 
     return 100. * wins / total
 
@@ -149,7 +443,14 @@ def main():
     
     MM_ARGS =       {"search_depth": 3, "method": 'minimax', "iterative": False}
     AB_ARGS =       {"search_depth": 5, "method": 'alphabeta', "iterative": False}
-    CUSTOM_ARGS =   {"search_depth": 3, "method": 'alphabeta', 'iterative': True}
+    # No agent ponders: both players of a match share a process, and the
+    # ponder thread would slow down the clock of its opponent (see pondering.py)
+    CUSTOM_ARGS =   {"search_depth": 3, "method": 'alphabeta', 'iterative': True, 'inplace': True,
+                 'ordering': 'killers', 'partial_results': True}
+    PVS_ARGS =      dict(CUSTOM_ARGS, method='pvs')
+    # PVS with the search enhancements that ID_custom_score does not have
+    TT_ARGS =       dict(PVS_ARGS, tt_size=1 << 16, keep_tt=True, aspiration=1.)
+    MTDF_ARGS =     dict(CUSTOM_ARGS, method='mtdf', tt_size=1 << 16, keep_tt=True)
 
     # Create a collection of CPU agents using fixed-depth minimax or alpha beta
     # search, or random selection.  The agent names encode the search method
@@ -177,22 +478,34 @@ def main():
 #                     Agent(CustomPlayer(score_fn=combo_nearcenter_avoidopponent_score, **CUSTOM_ARGS), "ID_combo_nearcenter_avoidopponent_score"),
 #                     Agent(CustomPlayer(score_fn=combo_offensive_nearopponent_netmobility_score, **CUSTOM_ARGS), "ID_combo_offensive_nearopponent_netmobility_score"),
 #                     Agent(CustomPlayer(score_fn=combo_netadvantage_nearopponent_score, **CUSTOM_ARGS), "ID_combo_netadvantage_nearopponent_score"),
-                    Agent(CustomPlayer(score_fn=custom_score, **CUSTOM_ARGS), "ID_custom_score")
+                    Agent(CustomPlayer(score_fn=custom_score, **CUSTOM_ARGS), "ID_custom_score"),
+                    Agent(CustomPlayer(score_fn=custom_score, **PVS_ARGS), "ID_custom_score_pvs"),
+                    Agent(CustomPlayer(score_fn=custom_score, **TT_ARGS), "ID_custom_score_pvs_tt"),
+#                     Agent(CustomPlayer(score_fn=custom_score, **MTDF_ARGS), "ID_custom_score_mtdf"),
                    ]
 
     print(DESCRIPTION)
-    for agentUT in test_agents:
-        print("")
-        print("*************************")
-        print("{:^25}".format("Evaluating: " + agentUT.name))
-        print("*************************")
-
-        agents = random_agents + mm_agents + ab_agents + [agentUT]
-        win_ratio = play_round(agents, NUM_MATCHES)
-
-        print("\n\nResults:")
-        print("----------")
-        print("{!s:<15}{:>10.2f}%".format(agentUT.name, win_ratio))
+    store = ResultStore(RESULTS) if RESULTS is not None else None
+    suite = load_suite(SUITE) if SUITE is not None else None
+    try:
+        for agentUT in test_agents:
+            print("")
+            print("*************************")
+            print("{:^25}".format("Evaluating: " + agentUT.name))
+            print("*************************")
+
+            agents = random_agents + mm_agents + ab_agents + [agentUT]
+            if SPRT_ARGS is not None:
+                win_ratio = play_round(agents, MAX_MATCHES, sprt=SPRT_ARGS, store=store, suite=suite)
+            else:
+                win_ratio = play_round(agents, NUM_MATCHES, store=store, suite=suite)
+
+            print("\n\nResults:")
+            print("----------")
+            print("{!s:<15}{:>10.2f}%".format(agentUT.name, win_ratio))
+    finally:
+        if store is not None:
+            store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+"""
+This file contains test cases for the tournaments of tournament.py: the
+scheduling of the matches on the worker processes and their seeds, the games
+recorded in the result store, and the matches played through an opening suite.
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.symmetry import canonical_position
+from openings import generate_suite, load_suite
+from resultstore import ResultStore
+from sample_players import RandomPlayer
+from scorefunctions import improved_score, null_score
+from tournament import TIME_LIMIT, Agent, pairing_config, play_matches, play_round
+
+
+class TournamentTest(unittest.TestCase):
+
+    def test_seeded_matches(self):
+        """ Test that the seeded matches do not depend on the number of workers """
+        def games(processes, seed):
+            results = sorted(play_matches(pairs, processes=processes, seed=seed))
+            return [(index, scores, [(game["opening"], game["moves"]) for game in records])
+                    for index, scores, records in results]
+
+        pairs = [(RandomPlayer(), RandomPlayer()) for _ in range(8)]
+        serial = games(1, 7)
+        self.assertEqual(list(range(8)), [index for index, _, _ in serial])
+        self.assertEqual(serial, games(2, 7))
+        self.assertNotEqual(serial, games(1, 8))
+
+        # The matches played in this process leave the global generator alone
+        state = random.getstate()
+        games(1, 7)
+        self.assertEqual(state, random.getstate())
+
+    def test_result_store(self):
+        """ Test that the recorded matches are not played again """
+        class CountingPlayer(RandomPlayer):
+            moves = 0
+
+            def get_move(self, game, legal_moves, time_left):
+                CountingPlayer.moves += 1
+                return super().get_move(game, legal_moves, time_left)
+
+        agents = [Agent(RandomPlayer(), "Random"), Agent(CountingPlayer(), "Counting")]
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "results.sqlite")
+            with ResultStore(path, batch=3) as store:
+                first = play_round(agents, 2, processes=1, store=store)
+            self.assertGreater(CountingPlayer.moves, 0)
+            with ResultStore(path) as store:
+                config = "seed=0 time_limit={}".format(TIME_LIMIT)
+                matches = store.matches(pairing_config(config, agents[1].player, agents[0].player))
+                self.assertEqual(4, len(matches))
+                for games in matches.values():
+                    self.assertEqual(2, len(games))
+                    for game in games:
+                        self.assertEqual({"Random", "Counting"}, {game["first"], game["second"]})
+                        self.assertEqual(len(game["move_times"]), sum(map(len, game["moves"])))
+                CountingPlayer.moves = 0
+                self.assertEqual(first, play_round(agents, 2, processes=1, store=store))
+                self.assertEqual(0, CountingPlayer.moves)
+                # Another configuration plays its own matches
+                play_round(agents, 1, processes=1, store=store, config="other")
+                self.assertGreater(CountingPlayer.moves, 0)
+                self.assertEqual(2, len(store.matches(pairing_config("other", agents[1].player, agents[0].player))))
+                # So do players with other parameters
+                CountingPlayer.moves = 0
+                agents[1].player.level = 1
+                play_round(agents, 2, processes=1, store=store)
+                self.assertGreater(CountingPlayer.moves, 0)
+        finally:
+            shutil.rmtree(workdir)
+
+        players = [game_agent.CustomPlayer(score_fn=improved_score), game_agent.CustomPlayer(score_fn=improved_score),
+                   game_agent.CustomPlayer(score_fn=null_score), game_agent.CustomPlayer(score_fn=improved_score, tt_size=8)]
+        configs = [pairing_config("", player, agents[0].player) for player in players]
+        self.assertEqual(configs[0], configs[1])
+        self.assertEqual(3, len(set(configs)))
+
+    def test_opening_suite(self):
+        """ Test the opening suite and the matches played through it """
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "openings.json")
+            openings = generate_suite(path, plies=2, width=5, height=5)
+            suite = load_suite(path)
+            self.assertEqual([tuple(map(tuple, opening)) for opening in openings], suite)
+            keys = set()
+            for opening in suite:
+                board = isolation.BitBoard("Player1", "Player2", 5, 5)
+                for move in opening:
+                    board.apply_move(move)
+                keys.add(canonical_position(board)[0])
+                own_moves = len(board.get_legal_moves(board.active_player))
+                opp_moves = len(board.get_legal_moves(board.inactive_player))
+                self.assertLessEqual(abs(own_moves - opp_moves), 1)
+            self.assertEqual(len(suite), len(keys))
+            self.assertEqual(5, len(generate_suite(path, count=5)))
+
+            agents = [Agent(RandomPlayer(), "Random"), Agent(RandomPlayer(), "Other")]
+            with ResultStore(os.path.join(workdir, "results.sqlite")) as store:
+                play_round(agents, 1, processes=1, store=store, config="suite", suite=load_suite(path))
+                matches = store.matches(pairing_config("suite", agents[1].player, agents[0].player))
+                self.assertEqual(5, len(matches))
+                for k, opening in enumerate(load_suite(path)):
+                    games = matches["Other vs Random #{}".format(k)]
+                    self.assertEqual([[list(move) for move in opening]] * 2,
+                                     [game["opening"] for game in games])
+                    self.assertEqual([games[0]["first"], games[0]["second"]],
+                                     [games[1]["second"], games[1]["first"]])
+        finally:
+            shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
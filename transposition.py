@@ -0,0 +1,133 @@
+"""This file contains the transposition table used by `CustomPlayer.alphabeta`
+to remember the result of positions it has already searched.
+
+The table is keyed by the Zobrist key of the board (`Board.hash()`) and has a
+fixed number of buckets, allocated up front, so its memory stays flat no
+matter how long it is kept. Every bucket holds two entries:
+
+    - a depth-preferred entry, only replaced by a search at least as deep
+      (or by the same position),
+    - an always-replace entry, that takes whatever the depth-preferred entry
+      refused (or the entry it displaced).
+"""
+
+EXACT = 0   # The score is the exact value of the position
+LOWER = 1   # The score is a lower bound (the search failed high)
+UPPER = 2   # The score is an upper bound (the search failed low)
+
+
+class TranspositionTable:
+    """Fixed-size table of search results keyed by position hash.
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The maximum number of entries kept in the table; two entries are
+        stored per bucket.
+    """
+
+    def __init__(self, max_entries=1 << 16):
+        self.num_buckets = max(1, max_entries // 2)
+        self.__deep__ = [None] * self.num_buckets
+        self.__recent__ = [None] * self.num_buckets
+        self.reset_stats()
+
+    def reset_stats(self):
+        """ Reset the probe/store counters reported by stats() """
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def clear(self):
+        """ Drop every entry of the table (the counters are kept) """
+        self.__deep__ = [None] * self.num_buckets
+        self.__recent__ = [None] * self.num_buckets
+
+    def probe(self, key):
+        """Look up a position in the table.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position, from `Board.hash()`.
+
+        Returns
+        -------
+        tuple(int, int, int, float, tuple(int, int)) or None
+            The stored (key, depth, bound, score, best move) entry for the
+            position, or None if the position is not in the table.
+        """
+        self.probes += 1
+        index = key % self.num_buckets
+        deep = self.__deep__[index]
+        if deep is not None and deep[0] == key:
+            self.hits += 1
+            return deep
+        recent = self.__recent__[index]
+        if recent is not None and recent[0] == key:
+            self.hits += 1
+            return recent
+        if deep is not None or recent is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, bound, score, move):
+        """Record the result of searching a position.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position, from `Board.hash()`.
+
+        depth : int
+            The depth the position was searched to.
+
+        bound : {EXACT, LOWER, UPPER}
+            Whether `score` is the exact value of the position or a bound.
+
+        score : float
+            The score returned by the search.
+
+        move : tuple(int, int)
+            The best move found for the position.
+        """
+        self.stores += 1
+        index = key % self.num_buckets
+        entry = (key, depth, bound, score, move)
+        deep = self.__deep__[index]
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            self.__deep__[index] = entry
+            if deep is None or deep[0] == key:
+                return
+            # The displaced entry falls back to the always-replace slot
+            entry = deep
+        recent = self.__recent__[index]
+        if recent is not None and recent[0] != entry[0]:
+            self.evictions += 1
+        self.__recent__[index] = entry
+
+    def __len__(self):
+        return sum(1 for entry in self.__deep__ if entry is not None) + \
+               sum(1 for entry in self.__recent__ if entry is not None)
+
+    def stats(self):
+        """Return the usage counters of the table, to help size it.
+
+        Returns
+        -------
+        dict
+            The number of entries in use and the capacity of the table, the
+            number of probes, hits (and hit rate), bucket collisions (probes
+            of a bucket holding other positions), stores and evictions (stores
+            that dropped another position from the table).
+        """
+        return {"entries": len(self),
+                "capacity": 2 * self.num_buckets,
+                "probes": self.probes,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.probes if self.probes else 0.,
+                "collisions": self.collisions,
+                "stores": self.stores,
+                "evictions": self.evictions}